@@ -4,30 +4,120 @@ SQL error handler module.
 Handles SQL query errors and attempts to repair them using LLM.
 """
 
+from collections import OrderedDict
 from typing import Tuple, Optional
+from itertools import groupby
+import difflib
+import functools
+import re
+import sys
+import threading
+from pathlib import Path
 import pandas as pd
-from langchain_groq import ChatGroq
+from langchain_core.messages import SystemMessage, HumanMessage
 
 from config.settings import settings
+from utils.llm_client import get_llm, warm_up_llm_connection
 from database.db_manager import DatabaseManager
 
 
+_NO_SUCH_COLUMN_RE = re.compile(r'no such column: ([\w.]+)')
+_NO_SUCH_TABLE_RE = re.compile(r'no such table: ([\w.]+)')
+
+# Static prefix (instructions + schema) goes first and is identical across
+# attempts, so providers that support prompt caching can reuse it.
+REPAIR_SYSTEM_PROMPT = """You are a SQL expert. A SQL query has failed with an error. Your task is to fix the query.
+
+When correcting a query, consider:
+1. Column names and table names must match the schema exactly
+2. Use proper SQLite syntax (e.g., strftime for dates)
+3. Ensure proper JOIN syntax if joining tables
+4. Check for proper GROUP BY usage with aggregations
+5. Verify WHERE clause conditions
+
+Provide ONLY the corrected SQL query, nothing else. Do not include any explanations or markdown formatting.
+
+Database Schema:
+"""
+
+REPAIR_USER_PROMPT = """Failed Query:
+{query}
+
+Error Message:
+{error}
+
+User Intent:
+{intent_context}
+
+Please provide a corrected SQL query that will execute successfully.
+"""
+
+
+# (db_path, schema_version) -> (columns, schema context), shared by every handler
+_SCHEMA_CACHE_MAX_ENTRIES = 16
+_schema_cache: "OrderedDict[Tuple[Path, int], Tuple[Tuple[Tuple[str, str, str], ...], str]]" = OrderedDict()
+_schema_cache_lock = threading.Lock()
+
+
+def _load_schema(db_manager: DatabaseManager) -> Tuple[Tuple[Tuple[str, str, str], ...], str]:
+    """
+    Load (table, column, type) rows and the schema context once per database and schema version.
+    
+    The context is interned so repeated repair prompts reference one string object.
+    """
+    key = (db_manager.db_path, db_manager.get_schema_version())
+    with _schema_cache_lock:
+        cached = _schema_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    columns = tuple(db_manager.get_all_columns())
+    context = sys.intern("\n".join(
+        f"\nTable: {table}\nColumns:\n"
+        + "\n".join(f"  - {name} ({col_type})" for _, name, col_type in table_columns)
+        for table, table_columns in groupby(columns, key=lambda col: col[0])
+    ))
+    
+    with _schema_cache_lock:
+        _schema_cache[key] = (columns, context)
+        while len(_schema_cache) > _SCHEMA_CACHE_MAX_ENTRIES:
+            _schema_cache.popitem(last=False)
+    return columns, context
+
+
+@functools.lru_cache(maxsize=16)
+def _repair_system_prompt(schema_context: str) -> str:
+    """Assemble the static repair system prompt once per schema context."""
+    return sys.intern("".join((REPAIR_SYSTEM_PROMPT, schema_context, "\n")))
+
+
 class SQLErrorHandler:
     """Handles SQL errors and attempts automatic repair."""
     
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: DatabaseManager, warm_up: bool = True):
         """
         Initialize error handler.
         
         Args:
             db_manager: Database manager instance
+            warm_up: Prefetch schema context and (once per process) open the LLM connection in the background
         """
         self.db_manager = db_manager
-        self.llm = ChatGroq(
-            model=settings.LLM_MODEL,
-            api_key=settings.GROQ_API_KEY,  # type: ignore
-            temperature=0.0
-        )
+        self.llm = get_llm(settings.LLM_MODEL, settings.GROQ_API_KEY, 0.0)  # type: ignore
+        
+        if warm_up:
+            threading.Thread(target=self._warm_up, daemon=True).start()
+            warm_up_llm_connection(settings.LLM_MODEL, settings.GROQ_API_KEY)  # type: ignore
+    
+    def _warm_up(self) -> None:
+        """Prime the schema context cache."""
+        try:
+            self._get_schema_context()
+        except Exception as e:
+            print(f"⚠️  Error handler warm-up failed: {e}")
+        finally:
+            # This thread's connection would otherwise outlive it
+            self.db_manager.close_thread_connection()
     
     def execute_with_retry(
         self,
@@ -47,6 +137,7 @@ class SQLErrorHandler:
         attempts = 0
         current_query = query
         last_error = None
+        schema_context = None  # Fetched lazily on the first failure
         
         while attempts < settings.MAX_REPAIR_ATTEMPTS:
             # Try to execute the query
@@ -66,8 +157,16 @@ class SQLErrorHandler:
             print(f"⚠️  Query error (attempt {attempts}/{settings.MAX_REPAIR_ATTEMPTS}): {error}")
             print("🔧 Attempting to repair query...")
             
-            # Get schema context for repair
-            schema_context = self._get_schema_context()
+            # Cheap rule-based fixes first, saving an LLM round-trip
+            fixed_query = self._apply_rule_fixes(current_query, error)
+            if fixed_query is not None:
+                print(f"🔧 Rule-based fix: {fixed_query}")
+                current_query = fixed_query
+                continue
+            
+            # Schema does not change between attempts, so fetch it only once
+            if schema_context is None:
+                schema_context = self._get_schema_context()
             
             # Attempt repair using LLM
             current_query = self._repair_query(
@@ -83,6 +182,39 @@ class SQLErrorHandler:
         # All attempts failed
         return pd.DataFrame(), last_error, query
     
+    def _apply_rule_fixes(self, query: str, error: str) -> Optional[str]:
+        """
+        Fix misspelled column or table names without calling the LLM.
+        
+        Args:
+            query: The failed SQL query
+            error: The error message
+            
+        Returns:
+            Fixed query, or None if no rule applies
+        """
+        column_match = _NO_SUCH_COLUMN_RE.search(error)
+        table_match = _NO_SUCH_TABLE_RE.search(error)
+        if not column_match and not table_match:
+            return None
+        
+        columns, _ = _load_schema(self.db_manager)
+        
+        if column_match:
+            # Qualified names (alias.column) only need the column part replaced
+            wrong_name = column_match.group(1).split(".")[-1]
+            candidates = sorted({name for _, name, _ in columns})
+        else:
+            wrong_name = table_match.group(1).split(".")[-1]  # type: ignore
+            candidates = sorted({table for table, _, _ in columns})
+        
+        matches = difflib.get_close_matches(wrong_name, candidates, n=1, cutoff=0.75)
+        if not matches or matches[0] == wrong_name:
+            return None
+        
+        fixed_query = re.sub(rf'\b{re.escape(wrong_name)}\b', matches[0], query)
+        return fixed_query if fixed_query != query else None
+    
     def _repair_query(
         self,
         query: str,
@@ -102,32 +234,17 @@ class SQLErrorHandler:
         Returns:
             Repaired query or None if repair failed
         """
-        prompt = f"""You are a SQL expert. A SQL query has failed with an error. Your task is to fix the query.
-
-Database Schema:
-{schema_context}
-
-Failed Query:
-{query}
-
-Error Message:
-{error}
-
-User Intent:
-{intent_context}
-
-Please provide a corrected SQL query that will execute successfully. Consider:
-1. Column names and table names must match the schema exactly
-2. Use proper SQLite syntax (e.g., strftime for dates)
-3. Ensure proper JOIN syntax if joining tables
-4. Check for proper GROUP BY usage with aggregations
-5. Verify WHERE clause conditions
-
-Provide ONLY the corrected SQL query, nothing else. Do not include any explanations or markdown formatting.
-"""
+        messages = [
+            SystemMessage(content=_repair_system_prompt(schema_context)),
+            HumanMessage(content=REPAIR_USER_PROMPT.format(
+                query=query,
+                error=error,
+                intent_context=intent_context
+            ))
+        ]
         
         try:
-            response = self.llm.invoke(prompt)
+            response = self.llm.invoke(messages)
             # Handle both string and AIMessage responses
             content = response.content if hasattr(response, 'content') else str(response)
             repaired_query = content.strip() if isinstance(content, str) else str(content).strip()
@@ -150,17 +267,10 @@ Provide ONLY the corrected SQL query, nothing else. Do not include any explanati
         """
         Get database schema context for error repair.
         
+        The context is rebuilt only when the database schema version changes.
+        
         Returns:
             Schema information string
         """
-        tables = self.db_manager.get_table_names()
-        context_parts = []
-        
-        for table in tables:
-            schema = self.db_manager.get_table_schema(table)
-            context_parts.append(f"\nTable: {table}")
-            context_parts.append("Columns:")
-            for col in schema:
-                context_parts.append(f"  - {col['name']} ({col['type']})")
-        
-        return "\n".join(context_parts)
+        _, schema_context = _load_schema(self.db_manager)
+        return schema_context
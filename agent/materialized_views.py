@@ -0,0 +1,194 @@
+"""
+Materialized summary tables for expensive analytics templates.
+
+SQLite has no native materialized views, so each view is a plain table
+rebuilt with CREATE TABLE ... AS from the template SQL. The tables live in
+a side database attached as "mv" (see database.db_manager), so they never
+show up in the analytics database's schema.
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from config.settings import settings
+from agent.query_templates import QueryTemplates
+from database.db_manager import MATERIALIZED_SCHEMA, SQLITE_PRAGMAS, materialized_db_path
+
+
+# template_id -> (table name, max age in seconds)
+MATERIALIZED_TEMPLATES: Dict[str, Tuple[str, int]] = {
+    "rfm_analysis": ("mv_rfm", 24 * 3600),
+    "cohort_analysis": ("mv_cohort", 24 * 3600),
+    "product_affinity": ("mv_product_affinity", 24 * 3600),
+    "abc_analysis": ("mv_abc", 7 * 24 * 3600),
+}
+
+_METADATA_TABLE = f"{MATERIALIZED_SCHEMA}.mv_metadata"
+
+# Databases that already have a refresh thread, shared across manager instances
+_refresh_threads: Dict[str, threading.Thread] = {}
+_refresh_lock = threading.Lock()
+
+
+class MaterializedViewManager:
+    """Build, refresh and serve materialized template results."""
+    
+    def __init__(self, db_path: Path = settings.DATABASE_PATH, templates: Optional[QueryTemplates] = None):
+        """
+        Initialize materialized view manager.
+        
+        Args:
+            db_path: Path to the SQLite database file
+            templates: Template library providing the source SQL
+        """
+        self.db_path = db_path
+        self.templates = templates or QueryTemplates()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open an autocommit connection with the view database attached and the metadata table present."""
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        conn.executescript(SQLITE_PRAGMAS)
+        conn.execute(
+            f"ATTACH DATABASE ? AS {MATERIALIZED_SCHEMA}",
+            (str(materialized_db_path(self.db_path)),)
+        )
+        conn.execute(f"PRAGMA {MATERIALIZED_SCHEMA}.journal_mode=WAL")
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {_METADATA_TABLE} "
+            "(table_name TEXT PRIMARY KEY, template_id TEXT, refreshed_at REAL)"
+        )
+        return conn
+    
+    def is_materialized(self, template_id: str) -> bool:
+        """Check whether a template is served from a summary table."""
+        return template_id in MATERIALIZED_TEMPLATES
+    
+    def get_refreshed_at(self, template_id: str) -> Optional[float]:
+        """
+        Get when a template's summary table was last rebuilt.
+        
+        Args:
+            template_id: Template ID
+        
+        Returns:
+            Unix timestamp, or None if it was never built
+        """
+        table_name, _ = MATERIALIZED_TEMPLATES[template_id]
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                f"SELECT refreshed_at FROM {_METADATA_TABLE} WHERE table_name = ?",
+                (table_name,)
+            ).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+    
+    def refresh(self, template_id: str) -> float:
+        """
+        Rebuild a template's summary table from its SQL.
+        
+        Args:
+            template_id: Template ID
+        
+        Returns:
+            Unix timestamp of the refresh
+        """
+        table_name, _ = MATERIALIZED_TEMPLATES[template_id]
+        template_sql = self.templates.get_template(template_id)["query"].strip().rstrip(";")
+        refreshed_at = time.time()
+        
+        conn = self._connect()
+        try:
+            # Build under a scratch name first: a failing template leaves the
+            # current table untouched
+            conn.execute(f"DROP TABLE IF EXISTS {MATERIALIZED_SCHEMA}.{table_name}__new")
+            conn.execute(f"CREATE TABLE {MATERIALIZED_SCHEMA}.{table_name}__new AS {template_sql}")
+            
+            # Swap in one transaction so readers never see the table missing
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(f"DROP TABLE IF EXISTS {MATERIALIZED_SCHEMA}.{table_name}")
+                conn.execute(f"ALTER TABLE {MATERIALIZED_SCHEMA}.{table_name}__new RENAME TO {table_name}")
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {_METADATA_TABLE} VALUES (?, ?, ?)",
+                    (table_name, template_id, refreshed_at)
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+        return refreshed_at
+    
+    def ensure_fresh(self, template_id: str) -> float:
+        """
+        Refresh a template's summary table if it is missing or older than its max age.
+        
+        Args:
+            template_id: Template ID
+        
+        Returns:
+            Unix timestamp of the data currently in the table
+        """
+        _, max_age = MATERIALIZED_TEMPLATES[template_id]
+        refreshed_at = self.get_refreshed_at(template_id)
+        if refreshed_at is None or time.time() - refreshed_at > max_age:
+            refreshed_at = self.refresh(template_id)
+        return refreshed_at
+    
+    def get_query(self, template_id: str) -> Tuple[str, float]:
+        """
+        Get SQL that reads a template's precomputed result.
+        
+        Args:
+            template_id: Template ID
+        
+        Returns:
+            Tuple of (SQL query, refresh timestamp)
+        """
+        table_name, _ = MATERIALIZED_TEMPLATES[template_id]
+        refreshed_at = self.ensure_fresh(template_id)
+        return f"SELECT * FROM {MATERIALIZED_SCHEMA}.{table_name}", refreshed_at
+    
+    def refresh_stale(self):
+        """Refresh previously built summary tables that are past their max age."""
+        conn = self._connect()
+        try:
+            built = [row[0] for row in conn.execute(f"SELECT template_id FROM {_METADATA_TABLE}")]
+        finally:
+            conn.close()
+        
+        for template_id in built:
+            if template_id not in MATERIALIZED_TEMPLATES:
+                continue
+            try:
+                self.ensure_fresh(template_id)
+            except Exception as e:
+                print(f"⚠️  Could not refresh materialized view for {template_id}: {e}")
+    
+    def start_background_refresh(self, check_interval: int = 3600):
+        """
+        Keep summary tables fresh from a daemon thread (one per database file).
+        
+        Args:
+            check_interval: Seconds between staleness checks
+        """
+        key = str(self.db_path)
+        with _refresh_lock:
+            thread = _refresh_threads.get(key)
+            if thread is not None and thread.is_alive():
+                return
+            thread = threading.Thread(target=self._refresh_loop, args=(check_interval,), daemon=True)
+            _refresh_threads[key] = thread
+            thread.start()
+    
+    def _refresh_loop(self, check_interval: int):
+        """Refresh stale tables on every check interval."""
+        while True:
+            time.sleep(check_interval)
+            self.refresh_stale()
@@ -1,59 +1,161 @@
 """
 Query caching system for improved performance.
 """
-import hashlib
-import json
+import sqlite3
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
 from typing import Optional, Dict, Any
-from datetime import datetime, timedelta
+
+
+def _estimate_size(query: str, result: Dict[str, Any]) -> int:
+    """Estimate the memory held by a cache entry with a shallow traversal."""
+    return len(query) + sys.getsizeof(result) + sum(sys.getsizeof(value) for value in result.values())
+
+
+@dataclass(slots=True)
+class CacheEntry:
+    """A cached result with its insertion time and estimated size."""
+    result: Dict[str, Any]
+    ts: float
+    query: str
+    size: int
 
 
 class QueryCache:
-    """Cache for query results and SQL generation."""
+    """LRU cache for query results and SQL generation."""
+    
+    def __init__(self, ttl_minutes: int = 60, max_entries: int = 256):
+        self.cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.ttl_s = ttl_minutes * 60.0
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
     
-    def __init__(self, ttl_minutes: int = 60):
-        self.cache: Dict[str, Dict[str, Any]] = {}
-        self.ttl = timedelta(minutes=ttl_minutes)
+    def _normalize(self, query: str) -> str:
+        """Normalize query text so trivial variants share a cache slot."""
+        return query.lower().strip()
     
-    def _get_key(self, query: str) -> str:
-        """Generate cache key from query."""
-        return hashlib.md5(query.lower().strip().encode()).hexdigest()
+    def _get_key(self, normalized_query: str) -> str:
+        """Generate cache key from an already-normalized query.
+        
+        The normalized text itself is the key: the dict hashes it and
+        compares on equality, so colliding hashes never share an entry.
+        """
+        return normalized_query
     
     def get(self, query: str) -> Optional[Dict[str, Any]]:
         """Get cached result if available and not expired."""
-        key = self._get_key(query)
+        key = self._get_key(self._normalize(query))
         
-        if key in self.cache:
-            entry = self.cache[key]
-            if datetime.now() - entry['timestamp'] < self.ttl:
-                entry['hit_count'] = entry.get('hit_count', 0) + 1
-                return entry['result']
+        entry = self.cache.get(key)
+        if entry is not None:
+            if time.monotonic() - entry.ts < self.ttl_s:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return entry.result
             else:
                 # Expired, remove it
-                del self.cache[key]
+                self._remove(key)
         
+        self.misses += 1
         return None
     
     def set(self, query: str, result: Dict[str, Any]):
-        """Cache a query result."""
-        key = self._get_key(query)
-        self.cache[key] = {
-            'result': result,
-            'timestamp': datetime.now(),
-            'query': query,
-            'hit_count': 0
-        }
+        """Cache a query result, evicting the least recently used entries."""
+        key = self._get_key(self._normalize(query))
+        if key in self.cache:
+            self._remove(key)
+        
+        size = _estimate_size(query, result)
+        self.cache[key] = CacheEntry(result=result, ts=time.monotonic(), query=query, size=size)
+        self._bytes += size
+        
+        while len(self.cache) > self.max_entries:
+            _, evicted = self.cache.popitem(last=False)
+            self._bytes -= evicted.size
+    
+    def _remove(self, key: str):
+        """Remove an entry and release its size from the byte counter."""
+        entry = self.cache.pop(key)
+        self._bytes -= entry.size
     
     def clear(self):
         """Clear all cached entries."""
         self.cache.clear()
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
-        total_entries = len(self.cache)
-        total_hits = sum(entry.get('hit_count', 0) for entry in self.cache.values())
-        
         return {
-            'total_entries': total_entries,
-            'total_hits': total_hits,
-            'cache_size_mb': len(json.dumps(self.cache, default=str)) / (1024 * 1024)
+            'total_entries': len(self.cache),
+            'max_entries': self.max_entries,
+            'total_hits': self.hits,
+            'total_misses': self.misses,
+            'cache_size_mb': self._bytes / (1024 * 1024)
         }
+
+
+class PersistentQueryCache:
+    """SQLite-backed cache of generated SQL that survives process restarts."""
+    
+    def __init__(self, db_path: Path, ttl_seconds: int = 86400):
+        """
+        Initialize persistent cache.
+        
+        Args:
+            db_path: Path to the SQLite file holding cached entries
+            ttl_seconds: Default lifetime of an entry in seconds
+        """
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sql_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.commit()
+        conn.close()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Get a cached value if present and not expired."""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            row = conn.execute(
+                "SELECT value FROM sql_cache WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"⚠️  Persistent cache read failed: {e}")
+            return None
+        
+        return row[0] if row else None
+    
+    def set(self, key: str, value: str, expire: Optional[int] = None):
+        """Store a value, replacing any existing entry for the key."""
+        expires_at = time.time() + (expire if expire is not None else self.ttl_seconds)
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute(
+                "INSERT OR REPLACE INTO sql_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at)
+            )
+            conn.commit()
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"⚠️  Persistent cache write failed: {e}")
+    
+    def clear(self):
+        """Remove all cached entries."""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("DELETE FROM sql_cache")
+        conn.commit()
+        conn.close()
@@ -4,7 +4,8 @@ Query Template Library
 Pre-built complex SQL queries for common analytics patterns.
 """
 
-from typing import Dict, List
+from types import MappingProxyType
+from typing import Dict, List, Mapping
 
 
 class QueryTemplates:
@@ -12,17 +13,35 @@ class QueryTemplates:
     
     def __init__(self):
         """Initialize query templates."""
-        self.templates = self._load_templates()
+        # Built once at import time and shared by every instance
+        self.templates = _TEMPLATES
+        self._by_category = _TEMPLATES_BY_CATEGORY
+        self._categories = _CATEGORIES
     
-    def _load_templates(self) -> Dict[str, Dict[str, str]]:
-        """Load all query templates."""
-        return {
-            "rfm_analysis": {
-                "name": "RFM Analysis (Recency, Frequency, Monetary)",
-                "description": "Segment customers based on purchase behavior",
-                "category": "Customer Segmentation",
-                "difficulty": "Advanced",
-                "query": """
+    def get_all_templates(self) -> Dict[str, Dict[str, str]]:
+        """Get all available templates."""
+        return self.templates
+    
+    def get_template(self, template_id: str) -> Mapping[str, str]:
+        """Get a specific template by ID (an empty read-only template if unknown)."""
+        return self.templates.get(template_id, _EMPTY_TEMPLATE)
+    
+    def get_templates_by_category(self, category: str) -> Mapping[str, Dict[str, str]]:
+        """Get templates filtered by category (read-only view)."""
+        return self._by_category.get(category, _EMPTY_CATEGORY)
+    
+    def get_categories(self) -> List[str]:
+        """Get all unique categories, sorted."""
+        return list(self._categories)
+
+
+_TEMPLATES: Dict[str, Dict[str, str]] = {
+    "rfm_analysis": {
+        "name": "RFM Analysis (Recency, Frequency, Monetary)",
+        "description": "Segment customers based on purchase behavior",
+        "category": "Customer Segmentation",
+        "difficulty": "Advanced",
+        "query": """
 -- RFM Analysis: Recency, Frequency, Monetary Value
 WITH customer_rfm AS (
     SELECT 
@@ -85,13 +104,13 @@ FROM rfm_scores
 ORDER BY monetary_value DESC
 LIMIT 50;
 """
-            },
-            "cohort_analysis": {
-                "name": "Cohort Analysis by Month",
-                "description": "Track customer retention over time by their first purchase month",
-                "category": "Customer Retention",
-                "difficulty": "Advanced",
-                "query": """
+    },
+    "cohort_analysis": {
+        "name": "Cohort Analysis by Month",
+        "description": "Track customer retention over time by their first purchase month",
+        "category": "Customer Retention",
+        "difficulty": "Advanced",
+        "query": """
 -- Cohort Analysis: Track retention by first purchase month
 WITH first_purchase AS (
     SELECT 
@@ -119,13 +138,13 @@ FROM purchase_activity
 GROUP BY cohort_month, months_since_first
 ORDER BY cohort_month, months_since_first;
 """
-            },
-            "product_affinity": {
-                "name": "Product Affinity Analysis",
-                "description": "Find products frequently bought together",
-                "category": "Product Analytics",
-                "difficulty": "Advanced",
-                "query": """
+    },
+    "product_affinity": {
+        "name": "Product Affinity Analysis",
+        "description": "Find products frequently bought together",
+        "category": "Product Analytics",
+        "difficulty": "Advanced",
+        "query": """
 -- Product Affinity: Find products frequently bought together
 WITH product_pairs AS (
     SELECT 
@@ -152,13 +171,13 @@ FROM product_pairs
 ORDER BY times_bought_together DESC
 LIMIT 20;
 """
-            },
-            "sales_trends": {
-                "name": "Sales Trend Analysis with Growth",
-                "description": "Monthly sales with month-over-month growth rates",
-                "category": "Sales Analytics",
-                "difficulty": "Intermediate",
-                "query": """
+    },
+    "sales_trends": {
+        "name": "Sales Trend Analysis with Growth",
+        "description": "Monthly sales with month-over-month growth rates",
+        "category": "Sales Analytics",
+        "difficulty": "Intermediate",
+        "query": """
 -- Sales Trends with MoM Growth
 WITH monthly_sales AS (
     SELECT 
@@ -191,13 +210,13 @@ SELECT
 FROM with_previous
 ORDER BY month DESC;
 """
-            },
-            "customer_lifetime_value": {
-                "name": "Customer Lifetime Value (CLV)",
-                "description": "Calculate total value and metrics per customer",
-                "category": "Customer Analytics",
-                "difficulty": "Intermediate",
-                "query": """
+    },
+    "customer_lifetime_value": {
+        "name": "Customer Lifetime Value (CLV)",
+        "description": "Calculate total value and metrics per customer",
+        "category": "Customer Analytics",
+        "difficulty": "Intermediate",
+        "query": """
 -- Customer Lifetime Value Analysis
 SELECT 
     c.customer_id,
@@ -219,13 +238,13 @@ HAVING total_orders > 0
 ORDER BY lifetime_value DESC
 LIMIT 25;
 """
-            },
-            "abc_analysis": {
-                "name": "ABC Analysis (Product Classification)",
-                "description": "Classify products by revenue contribution (Pareto principle)",
-                "category": "Product Analytics",
-                "difficulty": "Advanced",
-                "query": """
+    },
+    "abc_analysis": {
+        "name": "ABC Analysis (Product Classification)",
+        "description": "Classify products by revenue contribution (Pareto principle)",
+        "category": "Product Analytics",
+        "difficulty": "Advanced",
+        "query": """
 -- ABC Analysis: Classify products by revenue contribution
 WITH product_revenue AS (
     SELECT 
@@ -262,13 +281,13 @@ SELECT
 FROM with_cumulative
 ORDER BY revenue_rank;
 """
-            },
-            "sales_funnel": {
-                "name": "Sales Conversion Funnel",
-                "description": "Track conversion through the sales process",
-                "category": "Sales Analytics",
-                "difficulty": "Intermediate",
-                "query": """
+    },
+    "sales_funnel": {
+        "name": "Sales Conversion Funnel",
+        "description": "Track conversion through the sales process",
+        "category": "Sales Analytics",
+        "difficulty": "Intermediate",
+        "query": """
 -- Sales Funnel Analysis
 WITH funnel_stages AS (
     SELECT 
@@ -316,13 +335,13 @@ SELECT
     ROUND((repeat_customers - loyal_customers) * 100.0 / repeat_customers, 2)
 FROM funnel_stages;
 """
-            },
-            "category_performance": {
-                "name": "Product Category Performance",
-                "description": "Compare performance across product categories",
-                "category": "Product Analytics",
-                "difficulty": "Intermediate",
-                "query": """
+    },
+    "category_performance": {
+        "name": "Product Category Performance",
+        "description": "Compare performance across product categories",
+        "category": "Product Analytics",
+        "difficulty": "Intermediate",
+        "query": """
 -- Category Performance Dashboard
 SELECT 
     p.category,
@@ -339,26 +358,25 @@ LEFT JOIN orders o ON oi.order_id = o.order_id
 GROUP BY p.category
 ORDER BY total_revenue DESC;
 """
-            }
-        }
-    
-    def get_all_templates(self) -> Dict[str, Dict[str, str]]:
-        """Get all available templates."""
-        return self.templates
-    
-    def get_template(self, template_id: str) -> Dict[str, str]:  # type: ignore
-        """Get a specific template by ID."""
-        return self.templates.get(template_id)  # type: ignore
-    
-    def get_templates_by_category(self, category: str) -> Dict[str, Dict[str, str]]:
-        """Get templates filtered by category."""
-        return {
-            tid: template 
-            for tid, template in self.templates.items() 
-            if template["category"] == category
-        }
-    
-    def get_categories(self) -> List[str]:
-        """Get all unique categories."""
-        categories = set(template["category"] for template in self.templates.values())
-        return sorted(list(categories))
+    }
+}
+
+
+def _index_by_category(templates: Dict[str, Dict[str, str]]) -> Dict[str, Mapping[str, Dict[str, str]]]:
+    """Bucket templates by category in a single pass."""
+    buckets: Dict[str, Dict[str, Dict[str, str]]] = {}
+    for tid, template in templates.items():
+        buckets.setdefault(template["category"], {})[tid] = template
+    return {category: MappingProxyType(bucket) for category, bucket in buckets.items()}
+
+
+_TEMPLATES_BY_CATEGORY = _index_by_category(_TEMPLATES)
+_CATEGORIES = tuple(sorted(_TEMPLATES_BY_CATEGORY))
+_EMPTY_CATEGORY: Mapping[str, Dict[str, str]] = MappingProxyType({})
+_EMPTY_TEMPLATE: Mapping[str, str] = MappingProxyType({
+    "name": "",
+    "description": "",
+    "category": "",
+    "difficulty": "",
+    "query": ""
+})
@@ -0,0 +1,158 @@
+"""
+Semantic caching layer on top of the exact-match query cache.
+"""
+import re
+from typing import Optional, Dict, Any, List, Tuple
+import numpy as np
+
+from agent.query_cache import QueryCache
+
+
+# Numbers and quoted strings; questions differing in any of these are never the same
+_LITERAL_RE = re.compile(r"\d+(?:\.\d+)?|'[^']*'|\"[^\"]*\"")
+
+
+def _literals(normalized_query: str) -> Tuple[str, ...]:
+    """Get the sorted numeric and quoted literals of a normalized question."""
+    return tuple(sorted(_LITERAL_RE.findall(normalized_query)))
+
+
+class SemanticQueryCache:
+    """Return cached results for questions that are phrased differently but mean the same."""
+    
+    def __init__(
+        self,
+        exact_cache: Optional[QueryCache] = None,
+        threshold: float = 0.92
+    ):
+        """
+        Initialize semantic cache.
+        
+        The embedding index lives in memory only, like the results it points
+        to, and holds at most one row per exact-cache entry.
+        
+        Args:
+            exact_cache: Exact-match cache that stores the actual results
+            threshold: Minimum cosine similarity for a semantic hit
+        """
+        self.exact_cache = exact_cache or QueryCache()
+        self.threshold = threshold
+        self.semantic_hits = 0
+        
+        self._embedding_function = None
+        # Fixed-capacity matrix of unit-length rows; _active marks rows in use
+        self._embeddings: Optional[np.ndarray] = None
+        self._active = np.zeros(self.exact_cache.max_entries, dtype=bool)
+        # normalized question -> (row index, literals)
+        self._rows: Dict[str, Tuple[int, Tuple[str, ...]]] = {}
+        self._questions: List[Optional[str]] = [None] * self.exact_cache.max_entries
+    
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        """Embed a question with the same local model the vector store uses."""
+        try:
+            if self._embedding_function is None:
+                from utils.embeddings import get_embedding_function
+                self._embedding_function = get_embedding_function()
+            vector = np.asarray(self._embedding_function([text])[0], dtype=np.float32)
+        except Exception as e:
+            print(f"⚠️  Semantic cache embedding failed: {e}")
+            return None
+        
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+    
+    def get(self, query: str, conversation_memory: Optional[list] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get cached result for an identical or semantically similar question.
+        
+        Args:
+            query: User's question
+            conversation_memory: Previous exchanges; follow-ups skip the semantic match
+        
+        Returns:
+            Cached result, or None on a miss
+        """
+        result = self.exact_cache.get(query)
+        if result is not None or conversation_memory or not self._rows:
+            return result
+        
+        q = self._embed(query)
+        if q is None:
+            return None
+        
+        # Cosine similarity against every cached question in one matmul
+        scores = self._embeddings @ q  # type: ignore
+        scores[~self._active] = -np.inf
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        
+        # "top 5" vs "top 10" or "2023" vs "2024" embed almost identically
+        question = self._questions[best]
+        if self._rows[question][1] != _literals(self.exact_cache._normalize(query)):  # type: ignore
+            return None
+        
+        result = self.exact_cache.get(question)  # type: ignore
+        if result is None:
+            # Expired in the exact cache
+            self._drop(question)  # type: ignore
+        else:
+            self.semantic_hits += 1
+        return result
+    
+    def set(self, query: str, result: Dict[str, Any], conversation_memory: Optional[list] = None):
+        """
+        Cache a result and index its question embedding.
+        
+        Args:
+            query: User's question
+            result: Query result to cache
+            conversation_memory: Previous exchanges; follow-ups are not indexed
+        """
+        self.exact_cache.set(query, result)
+        
+        # Keep the index aligned with entries the exact cache evicted
+        if len(self._rows) >= len(self.exact_cache.cache):
+            for question in [q for q in self._rows if q not in self.exact_cache.cache]:
+                self._drop(question)
+        
+        normalized = self.exact_cache._normalize(query)
+        if conversation_memory or normalized in self._rows:
+            return
+        
+        q = self._embed(query)
+        if q is None:
+            return
+        
+        if self._embeddings is None:
+            self._embeddings = np.zeros((len(self._active), q.shape[0]), dtype=np.float32)
+        free_rows = np.flatnonzero(~self._active)
+        if not len(free_rows):
+            return
+        
+        row = int(free_rows[0])
+        self._embeddings[row] = q
+        self._active[row] = True
+        self._questions[row] = normalized
+        self._rows[normalized] = (row, _literals(normalized))
+    
+    def _drop(self, question: str):
+        """Remove a question's row from the index."""
+        row, _ = self._rows.pop(question)
+        self._active[row] = False
+        self._questions[row] = None
+    
+    def clear(self):
+        """Clear cached results and the embedding index."""
+        self.exact_cache.clear()
+        self._active[:] = False
+        self._rows.clear()
+        self._questions = [None] * len(self._active)
+        self.semantic_hits = 0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        stats = self.exact_cache.get_stats()
+        stats['semantic_entries'] = len(self._rows)
+        stats['semantic_hits'] = self.semantic_hits
+        return stats
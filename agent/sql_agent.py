@@ -4,20 +4,84 @@ SQL Agent module.
 LangChain-based agent for natural language to SQL conversion.
 """
 
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, List, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import re
+import numpy as np
 import pandas as pd
 import time
-from langchain_groq import ChatGroq
+import sqlalchemy
 
 from config.settings import settings
 from agent.tools import SQLAgentTools
 from agent.error_handler import SQLErrorHandler
-from agent.query_cache import QueryCache
+from agent.query_cache import QueryCache, PersistentQueryCache
+from agent.semantic_cache import SemanticQueryCache
+from agent.template_router import TemplateRouter
+from agent.materialized_views import MaterializedViewManager
 from agent.sql_validator import SQLValidator
 from database.db_manager import DatabaseManager
 from rag.vector_store import VectorStore
 from rag.query_expander import QueryExpander
 from utils.performance_tracker import PerformanceTracker
+from utils.fast_stats import col_stats
+from utils.llm_client import get_llm
+
+
+# Opening ```/```sql and closing ``` fences around LLM-generated SQL
+_FENCE_RE = re.compile(r"^\s*```(?:sql)?\s*\n?|\n?```\s*$", re.MULTILINE | re.IGNORECASE)
+
+# Short-lived reuse of engine results for identical SQL text
+RESULT_CACHE_TTL_SECONDS = 60
+RESULT_CACHE_MAX_ENTRIES = 32
+
+# Retrieved schema context per question
+SCHEMA_CACHE_MAX_ENTRIES = 128
+
+# Shared by every agent: agents are rebuilt on each database switch, and
+# per-instance pools were never shut down
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="sql-agent")
+
+# Prompt templates, filled per call with str.format_map
+SQL_PROMPT = """Given the following database schema and a user question, generate a SQL query.
+
+Database Schema:
+{schema}
+{context}
+
+User Question: {question}
+
+Generate a valid SQLite SQL query that answers the question. Important:
+- Use proper SQLite syntax
+- For date operations, use strftime() function
+- Use appropriate JOINs when accessing multiple tables
+- Include proper GROUP BY for aggregations
+- Add ORDER BY and LIMIT when appropriate
+- Use meaningful aliases
+- If this is a follow-up question (like "show more", "break it down"), reference the previous SQL context
+
+Provide ONLY the SQL query, no explanations or markdown formatting.
+"""
+
+INSIGHTS_PROMPT = """Analyze the following SQL query results and provide insights.
+
+Original Question: {question}
+
+SQL Query: {sql_query}
+
+Results:
+{data_summary}
+
+Provide a clear, concise summary of the insights. Include:
+1. Direct answer to the user's question
+2. Key findings and trends
+3. Notable patterns or anomalies
+4. Any actionable insights
+
+Keep it brief and focused (3-5 sentences).
+"""
 
 
 class SQLAgent:
@@ -48,17 +112,25 @@ class SQLAgent:
         self.agent_tools = SQLAgentTools()
         
         # Initialize enhanced components
-        self.cache = QueryCache(ttl_minutes=30)
+        self.cache = SemanticQueryCache(
+            QueryCache(ttl_minutes=30),
+            threshold=settings.SEMANTIC_CACHE_THRESHOLD
+        )
+        self.sql_cache = PersistentQueryCache(settings.SQL_CACHE_PATH, ttl_seconds=settings.SQL_CACHE_TTL_SECONDS)
+        self._schema_fingerprint = None
         self.validator = SQLValidator()
         self.query_expander = QueryExpander()
+        # Templates are written against the built-in sales schema only
+        self.template_router = TemplateRouter(threshold=settings.TEMPLATE_MATCH_THRESHOLD) if self.db_manager else None
+        self.materialized_views = MaterializedViewManager(self.db_manager.db_path) if self.db_manager else None
         self.perf_tracker = PerformanceTracker()
+        self._result_cache: "OrderedDict[str, Tuple[pd.DataFrame, float]]" = OrderedDict()
+        self._schema_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._full_schema = None
+        self._all_documents = None
         
         # Initialize LLM
-        self.llm = ChatGroq(
-            model=settings.LLM_MODEL,  # type: ignore
-            api_key=settings.GROQ_API_KEY,  # type: ignore
-            temperature=settings.LLM_TEMPERATURE  # type: ignore
-        )
+        self.llm = get_llm(settings.LLM_MODEL, settings.GROQ_API_KEY, settings.LLM_TEMPERATURE)  # type: ignore
 
     
     def _get_system_prompt(self) -> str:
@@ -88,7 +160,7 @@ Important guidelines:
 
 Be concise and focus on generating accurate SQL queries."""
     
-    def query(self, user_question: str, conversation_memory: list = None, use_cache: bool = True) -> Dict[str, Any]:  # type: ignore
+    def query(self, user_question: str, conversation_memory: list = None, use_cache: bool = True, tables: Optional[List[str]] = None) -> Dict[str, Any]:  # type: ignore
         """
         Enhanced query processing with caching, validation, and tracking.
         
@@ -96,6 +168,8 @@ Be concise and focus on generating accurate SQL queries."""
             user_question: User's question in natural language
             conversation_memory: Previous conversation context
             use_cache: Whether to use query caching
+            tables: Tables the question names explicitly; their schema documents
+                are used as context instead of a vector search
             
         Returns:
             Dictionary with results, SQL query, and metadata
@@ -105,7 +179,7 @@ Be concise and focus on generating accurate SQL queries."""
         try:
             # Check cache first
             if use_cache:
-                cached_result = self.cache.get(user_question)
+                cached_result = self.cache.get(user_question, conversation_memory)
                 if cached_result:
                     print(f"⚡ Cache hit! Returning cached result")
                     cached_result['from_cache'] = True
@@ -113,27 +187,40 @@ Be concise and focus on generating accurate SQL queries."""
                     cached_result['execution_time'] = time.time() - start_time
                     return cached_result
             
-            # Expand query for better RAG retrieval
-            print(f"🔍 Expanding query for better context...")
-            expanded_queries = self.query_expander.expand_query(user_question)
-            
-            # Get relevant schema context with expanded queries
-            schema_context = ""
-            for exp_query in expanded_queries[:2]:  # Use top 2 expansions
-                if self.vector_store:
-                    context = self.vector_store.get_relevant_context(exp_query)
-                elif self.vectorstore:
-                    # Use dynamic vectorstore
-                    docs = self.vectorstore.similarity_search(exp_query, k=5)
-                    context = "\n".join([doc.page_content for doc in docs])
-                else:
-                    context = ""
-                schema_context += context + "\n"
+            # SQL generated for the same question and schema survives restarts
+            sql_cache_key = self._get_sql_cache_key(user_question, conversation_memory)
+            sql_query = self.sql_cache.get(sql_cache_key) if use_cache else None
             
-            # Generate SQL using agent
-            print(f"🤔 Processing query: {user_question}")
+            template_match = None
+            materialized_at = None
+            if not sql_query and self.template_router and not conversation_memory:
+                template_match = self.template_router.match(user_question)
             
-            sql_query = self._generate_sql_query(user_question, schema_context, conversation_memory)
+            if sql_query:
+                print(f"⚡ Persistent cache hit! Reusing generated SQL")
+            elif template_match:
+                template_id, sql_query = template_match
+                print(f"📋 Matched query template '{template_id}', skipping SQL generation")
+                if self.materialized_views.is_materialized(template_id):  # type: ignore
+                    try:
+                        sql_query, materialized_at = self.materialized_views.get_query(template_id)  # type: ignore
+                        # Summary tables are built on first use, then kept fresh in the background
+                        self.materialized_views.start_background_refresh()  # type: ignore
+                    except Exception as e:
+                        print(f"⚠️  Materialized view unavailable, running template SQL: {e}")
+            else:
+                # Small schemas are sent whole; questions naming tables get those tables'
+                # documents; otherwise expand the query for better RAG retrieval
+                schema_context = (
+                    self._get_full_schema()
+                    or (self._get_table_context(tables) if tables else "")
+                    or self._retrieve_schema_context(user_question)
+                )
+                
+                # Generate SQL using agent
+                print(f"🤔 Processing query: {user_question}")
+                
+                sql_query = self._generate_sql_query(user_question, schema_context, conversation_memory)
             
             if not sql_query:
                 result = {
@@ -179,14 +266,8 @@ Be concise and focus on generating accurate SQL queries."""
                 )
             else:
                 # Use dynamic engine directly
-                try:
-                    df = pd.read_sql(sql_query, self.engine)
-                    error = None
-                    final_query = sql_query
-                except Exception as e:
-                    df = None
-                    error = str(e)
-                    final_query = sql_query
+                df, error = self._execute_on_engine(sql_query, use_cache)
+                final_query = sql_query
             
             execution_time = time.time() - start_time
             
@@ -204,6 +285,10 @@ Be concise and focus on generating accurate SQL queries."""
             
             print(f"✅ Query executed successfully. Found {len(df)} rows.")
             
+            warnings = validation.get('warnings', [])
+            if df.attrs.get('truncated_at'):
+                warnings = warnings + [f"Result truncated to the first {df.attrs['truncated_at']:,} rows"]
+            
             result = {
                 "success": True,
                 "sql_query": final_query,
@@ -211,15 +296,20 @@ Be concise and focus on generating accurate SQL queries."""
                 "row_count": len(df),
                 "execution_time": execution_time,
                 "from_cache": False,
-                "validation_warnings": validation.get('warnings', [])
+                "validation_warnings": warnings
             }
+            if materialized_at is not None:
+                result["materialized_at"] = materialized_at
             
             # Track performance
             self.perf_tracker.track_query(user_question, final_query, execution_time, len(df), True)
             
             # Cache successful results
             if use_cache:
-                self.cache.set(user_question, result)
+                self.cache.set(user_question, result, conversation_memory)
+                # SQL reading a summary table would skip its freshness check on replay
+                if materialized_at is None:
+                    self.sql_cache.set(sql_cache_key, final_query)
             
             return result
                 
@@ -231,6 +321,50 @@ Be concise and focus on generating accurate SQL queries."""
                 "data": None
             }
     
+    def _execute_on_engine(self, sql_query: str, use_cache: bool = True) -> Tuple[pd.DataFrame, str]:
+        """
+        Execute SQL on the dynamic engine, reusing recent results for identical SQL.
+        
+        Results larger than settings.MAX_RESULT_ROWS are truncated and marked
+        with df.attrs['truncated_at'].
+        
+        Args:
+            sql_query: SQL query to execute
+            use_cache: Whether to reuse a recent result for the same SQL
+            
+        Returns:
+            Tuple of (DataFrame or None, error message or None)
+        """
+        cached = self._result_cache.get(sql_query) if use_cache else None
+        if cached is not None and time.monotonic() - cached[1] < RESULT_CACHE_TTL_SECONDS:
+            self._result_cache.move_to_end(sql_query)
+            return cached[0], None  # type: ignore
+        
+        max_rows = settings.MAX_RESULT_ROWS
+        try:
+            with self.engine.connect().execution_options(stream_results=True) as conn:
+                # Read in chunks so oversized results stop at max_rows instead of filling memory
+                chunks = []
+                row_count = 0
+                for chunk in pd.read_sql(sql_query, conn, chunksize=50_000):
+                    chunks.append(chunk)
+                    row_count += len(chunk)
+                    if row_count > max_rows:
+                        break
+        except Exception as e:
+            return None, str(e)  # type: ignore
+        
+        df = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+        if row_count > max_rows:
+            df = df.iloc[:max_rows]
+            df.attrs['truncated_at'] = max_rows
+        
+        self._result_cache[sql_query] = (df, time.monotonic())
+        self._result_cache.move_to_end(sql_query)
+        while len(self._result_cache) > RESULT_CACHE_MAX_ENTRIES:
+            self._result_cache.popitem(last=False)
+        return df, None  # type: ignore
+    
     def _generate_sql_query(self, question: str, schema_context: str, conversation_memory: list = None) -> str:  # type: ignore
         """
         Generate SQL query from natural language question with conversation context.
@@ -243,54 +377,218 @@ Be concise and focus on generating accurate SQL queries."""
         Returns:
             Generated SQL query
         """
-        # Build conversation context if available
-        context_str = ""
-        if conversation_memory and len(conversation_memory) > 0:
-            context_str = "\n\nPrevious Conversation Context:\n"
-            for i, conv in enumerate(conversation_memory[-3:]):  # Last 3 exchanges
-                context_str += f"Q{i+1}: {conv.get('question', '')}\n"
-                if conv.get('sql'):
-                    context_str += f"SQL{i+1}: {conv.get('sql')}\n"
+        context_str = self._build_conversation_context(conversation_memory)
         
-        prompt = f"""Given the following database schema and a user question, generate a SQL query.
-
-Database Schema:
-{schema_context}
-{context_str}
-
-User Question: {question}
-
-Generate a valid SQLite SQL query that answers the question. Important:
-- Use proper SQLite syntax
-- For date operations, use strftime() function
-- Use appropriate JOINs when accessing multiple tables
-- Include proper GROUP BY for aggregations
-- Add ORDER BY and LIMIT when appropriate
-- Use meaningful aliases
-- If this is a follow-up question (like "show more", "break it down"), reference the previous SQL context
-
-Provide ONLY the SQL query, no explanations or markdown formatting.
-"""
+        prompt = SQL_PROMPT.format_map({
+            "schema": schema_context,
+            "context": context_str,
+            "question": question
+        })
         
         try:
             response = self.llm.invoke(prompt)
             # Handle both string and AIMessage responses
             content = response.content if hasattr(response, 'content') else str(response)
-            sql_query = content.strip() if isinstance(content, str) else str(content).strip()
             
             # Clean up markdown if present
-            if sql_query.startswith("```"):
-                lines = sql_query.split("\n")
-                sql_query = "\n".join(lines[1:-1]) if len(lines) > 2 else sql_query
-            
-            sql_query = sql_query.replace("```sql", "").replace("```", "").strip()
-            
-            return sql_query
+            return _FENCE_RE.sub("", str(content)).strip()
             
         except Exception as e:
             print(f"❌ Error generating SQL: {e}")
             return ""
     
+    def _search_schema_documents(self, queries: list) -> list:
+        """
+        Search schema documents for several phrasings with one embedding + search call.
+        
+        Args:
+            queries: Question phrasings to search with
+            
+        Returns:
+            Document contents with duplicates removed
+        """
+        if self.vector_store:
+            return self.vector_store.search_documents_multi(queries)
+        
+        if self.vectorstore:
+            # Use dynamic vectorstore: embed all phrasings at once and query Chroma as a batch
+            embeddings = self.vectorstore.embeddings.embed_documents(queries)
+            results = self.vectorstore._collection.query(
+                query_embeddings=embeddings,
+                n_results=5,
+                include=["documents"]
+            )
+            return list(dict.fromkeys(
+                content
+                for query_documents in (results.get("documents") or [])
+                for content in query_documents
+            ))
+        
+        return []
+    
+    def _retrieve_schema_context(self, question: str) -> str:
+        """
+        Retrieve schema context for a question and its top expansion.
+        
+        The schema search for the original question runs while the
+        expansion LLM call is in flight, so retrieval mostly overlaps
+        the network wait instead of following it.
+        
+        Args:
+            question: User's natural language question
+            
+        Returns:
+            Schema context with duplicate documents removed
+        """
+        key = question.strip().lower()
+        cached = self._schema_cache.get(key)
+        if cached is not None:
+            self._schema_cache.move_to_end(key)
+            return cached
+        
+        print(f"🔍 Expanding query for better context...")
+        expansion = _executor.submit(self.query_expander.expand_query, question)
+        documents = self._search_schema_documents([question])
+        expanded_queries = expansion.result()
+        
+        # Add documents for the top alternative phrasing
+        if len(expanded_queries) > 1:
+            documents = list(dict.fromkeys(documents + self._search_schema_documents(expanded_queries[1:2])))
+        
+        if self.vector_store:
+            context = self.vector_store.format_context(documents)
+        else:
+            context = "\n".join(documents)
+        
+        self._schema_cache[key] = context
+        while len(self._schema_cache) > SCHEMA_CACHE_MAX_ENTRIES:
+            self._schema_cache.popitem(last=False)
+        return context
+    
+    def _get_all_documents(self) -> List[str]:
+        """
+        Get every schema document, loaded once per agent.
+        
+        Returns:
+            Document contents (empty if the store could not be read)
+        """
+        if self._all_documents is None:
+            try:
+                if self.vector_store:
+                    self._all_documents = self.vector_store.get_all_documents()
+                elif self.vectorstore:
+                    self._all_documents = self.vectorstore.get(include=["documents"]).get("documents") or []
+                else:
+                    self._all_documents = []
+            except Exception as e:
+                print(f"⚠️  Could not load schema documents: {e}")
+                self._all_documents = []
+        return self._all_documents
+    
+    def _format_documents(self, documents: List[str]) -> str:
+        """Join schema documents into prompt context."""
+        if self.vector_store:
+            return self.vector_store.format_context(documents)
+        return "\n".join(documents)
+    
+    def _get_full_schema(self) -> str:
+        """
+        Get every schema document as context when the schema is small enough.
+        
+        Loaded once per agent. Small schemas fit in the prompt whole, which
+        skips query expansion and vector search entirely.
+        
+        Returns:
+            Full schema context, or an empty string if it exceeds settings.FULL_SCHEMA_MAX_CHARS
+        """
+        if self._full_schema is None:
+            self._full_schema = ""
+            documents = self._get_all_documents()
+            if documents and sum(map(len, documents)) <= settings.FULL_SCHEMA_MAX_CHARS:
+                self._full_schema = self._format_documents(documents)
+        return self._full_schema
+    
+    def _get_table_context(self, tables: List[str]) -> str:
+        """
+        Get the schema documents that mention any of the given tables.
+        
+        A plain text filter over the already-loaded documents, so no query
+        embedding or vector search is needed.
+        
+        Args:
+            tables: Table names named in the question
+            
+        Returns:
+            Schema context, or an empty string if no document mentions the tables
+        """
+        pattern = re.compile(r"\b(?:" + "|".join(map(re.escape, tables)) + r")\b", re.IGNORECASE)
+        documents = [doc for doc in self._get_all_documents() if pattern.search(doc)]
+        return self._format_documents(documents) if documents else ""
+    
+    def _build_conversation_context(self, conversation_memory: list = None) -> str:  # type: ignore
+        """
+        Format the last few exchanges for the SQL generation prompt.
+        
+        Args:
+            conversation_memory: Previous conversation context
+            
+        Returns:
+            Conversation context string (empty if there is no history)
+        """
+        if not conversation_memory:
+            return ""
+        
+        parts = ["\n\nPrevious Conversation Context:\n"]
+        for i, conv in enumerate(conversation_memory[-3:]):  # Last 3 exchanges
+            parts.append(f"Q{i+1}: {conv.get('question', '')}\n")
+            sql = conv.get('sql')
+            if sql:
+                parts.append(f"SQL{i+1}: {sql}\n")
+        return "".join(parts)
+    
+    def _get_schema_fingerprint(self) -> str:
+        """
+        Get a digest of the connected database's tables and columns.
+        
+        Computed once per agent; the agent is recreated when the connection changes.
+        
+        Returns:
+            Hex digest of the schema structure
+        """
+        if self._schema_fingerprint is None:
+            if self.db_manager:
+                structure = repr(self.db_manager.get_all_columns())
+            else:
+                inspector = sqlalchemy.inspect(self.engine)
+                structure = repr([
+                    (table, [(col['name'], str(col['type'])) for col in inspector.get_columns(table)])
+                    for table in inspector.get_table_names()
+                ])
+            self._schema_fingerprint = hashlib.sha256(structure.encode()).hexdigest()
+        return self._schema_fingerprint
+    
+    def _get_sql_cache_key(self, question: str, conversation_memory: list = None) -> str:  # type: ignore
+        """
+        Build the persistent cache key for a question.
+        
+        Follow-up questions depend on earlier exchanges, so the conversation
+        context is part of the key.
+        
+        Args:
+            question: User's natural language question
+            conversation_memory: Previous conversation context
+            
+        Returns:
+            SHA-256 hex digest
+        """
+        raw = "|".join((
+            question.strip().lower(),
+            settings.LLM_MODEL,
+            self._get_schema_fingerprint(),
+            self._build_conversation_context(conversation_memory)
+        ))
+        return hashlib.sha256(raw.encode()).hexdigest()
+    
     def generate_insights(self, question: str, data: pd.DataFrame, sql_query: str) -> str:
         """
         Generate natural language insights from query results.
@@ -303,7 +601,6 @@ Provide ONLY the SQL query, no explanations or markdown formatting.
         Returns:
             Natural language insights
         """
-        import pandas as pd
         
         # Handle different data types
         if isinstance(data, tuple):
@@ -320,37 +617,110 @@ Provide ONLY the SQL query, no explanations or markdown formatting.
         if df.empty:
             return "No results found for this query."
         
+        # Insights are reused only for the same question and SQL on the same
+        # schema with identical result data
+        insights_key = hashlib.sha256(
+            f"insights|{self._get_schema_fingerprint()}|{question}|{sql_query}|{self._result_digest(df)}".encode()
+        ).hexdigest()
+        cached_insights = self.sql_cache.get(insights_key)
+        if cached_insights:
+            return cached_insights
+        
         # Prepare data summary
         data_summary = f"Found {len(df)} rows.\n"
         data_summary += f"Columns: {', '.join(df.columns)}\n"
-        data_summary += f"\nFirst few rows:\n{df.head(10).to_string(index=False)}"
+        data_summary += f"\nFirst few rows:\n{self._format_preview(df)}"
+        if len(df) > 10:
+            data_summary += self._format_numeric_summary(df)
         
-        prompt = f"""Analyze the following SQL query results and provide insights.
-
-Original Question: {question}
-
-SQL Query: {sql_query}
-
-Results:
-{data_summary}
-
-Provide a clear, concise summary of the insights. Include:
-1. Direct answer to the user's question
-2. Key findings and trends
-3. Notable patterns or anomalies
-4. Any actionable insights
-
-Keep it brief and focused (3-5 sentences).
-"""
+        prompt = INSIGHTS_PROMPT.format_map({
+            "question": question,
+            "sql_query": sql_query,
+            "data_summary": data_summary
+        })
         
         try:
             response = self.llm.invoke(prompt)
             # Handle both string and AIMessage responses
             content = response.content if hasattr(response, 'content') else str(response)
-            return content.strip() if isinstance(content, str) else str(content).strip()
+            insights = content.strip() if isinstance(content, str) else str(content).strip()
+            self.sql_cache.set(insights_key, insights)
+            return insights
         except Exception as e:
             return f"Unable to generate insights: {str(e)}"
     
+    def _result_digest(self, df: pd.DataFrame) -> str:
+        """
+        Get a cheap digest of a result's contents.
+        
+        Args:
+            df: Query result
+            
+        Returns:
+            Row count and summed row hashes
+        """
+        try:
+            row_hashes = pd.util.hash_pandas_object(df, index=False)
+        except TypeError:
+            # Unhashable cells (e.g. lists); hash their text instead
+            row_hashes = pd.util.hash_pandas_object(df.astype(str), index=False)
+        return f"{len(df)}:{int(row_hashes.sum())}"
+    
+    def _format_numeric_summary(self, df: pd.DataFrame, max_columns: int = 12) -> str:
+        """
+        Summarize numeric columns over all rows, not just the preview.
+        
+        Args:
+            df: Query result DataFrame
+            max_columns: Maximum number of numeric columns to summarize
+            
+        Returns:
+            Summary text (empty if there are no numeric columns)
+        """
+        numeric_columns = df.select_dtypes(include="number").columns[:max_columns]
+        if len(numeric_columns) == 0:
+            return ""
+        
+        lines = ["\n\nNumeric summary (all rows):"]
+        for col in numeric_columns:
+            total, mean, lo, hi, nan_count = col_stats(df[col].to_numpy(dtype=np.float64, na_value=np.nan))
+            line = f"- {col}: sum={total:.2f}, mean={mean:.2f}, min={lo:.2f}, max={hi:.2f}"
+            if nan_count:
+                line += f", missing={nan_count}"
+            lines.append(line)
+        return "\n".join(lines)
+    
+    def _format_preview(self, df: pd.DataFrame, rows: int = 10) -> str:
+        """
+        Format a compact row preview for the insights prompt.
+        
+        Large results are sampled rather than truncated to the first rows,
+        and width/precision are capped to keep the prompt small.
+        
+        Args:
+            df: Query result DataFrame
+            rows: Number of rows to include
+            
+        Returns:
+            Preview text
+        """
+        preview = df.sample(rows, random_state=0) if len(df) > 10_000 else df.head(rows)
+        
+        # Very wide/large results: drop near-unique text columns (IDs, free text)
+        if df.memory_usage(deep=False).sum() > 50_000_000:
+            sample = df.head(1000)
+            object_columns = sample.select_dtypes(include="object").columns
+            noisy = [col for col in object_columns if sample[col].nunique() > 0.9 * len(sample)]
+            if len(noisy) < len(df.columns):
+                preview = preview.drop(columns=noisy)
+        
+        return preview.to_string(
+            index=False,
+            max_cols=12,
+            max_colwidth=40,
+            float_format=lambda x: f"{x:.2f}"
+        )
+    
     def get_performance_stats(self) -> Dict[str, Any]:
         """Get performance statistics."""
         return self.perf_tracker.get_statistics()
@@ -366,6 +736,9 @@ Keep it brief and focused (3-5 sentences).
     def clear_cache(self):
         """Clear query cache."""
         self.cache.clear()
+        self.sql_cache.clear()
+        self._result_cache.clear()
+        self._schema_cache.clear()
         print("✅ Cache cleared")
     
     def clear_performance_history(self):
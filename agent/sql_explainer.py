@@ -4,10 +4,41 @@ SQL Explainer Module
 Breaks down SQL queries into understandable components.
 """
 
-from typing import Dict, List
+from collections import Counter
+from typing import Dict, List, Optional
+import copy
+import functools
 import re
 
 
+_FROM_RE = re.compile(r'FROM\s+(\w+)', re.IGNORECASE)
+_JOIN_TABLE_RE = re.compile(r'JOIN\s+(\w+)', re.IGNORECASE)
+_JOIN_PATTERNS = [
+    (re.compile(r'(INNER\s+)?JOIN\s+(\w+)\s+ON\s+([^WHERE^GROUP^ORDER^;]+)', re.IGNORECASE), 'INNER JOIN'),
+    (re.compile(r'LEFT\s+JOIN\s+(\w+)\s+ON\s+([^WHERE^GROUP^ORDER^;]+)', re.IGNORECASE), 'LEFT JOIN'),
+    (re.compile(r'RIGHT\s+JOIN\s+(\w+)\s+ON\s+([^WHERE^GROUP^ORDER^;]+)', re.IGNORECASE), 'RIGHT JOIN')
+]
+_WHERE_RE = re.compile(r'WHERE\s+(.+?)(?:GROUP BY|ORDER BY|LIMIT|;|$)', re.IGNORECASE | re.DOTALL)
+_AND_OR_SPLIT_RE = re.compile(r'\s+(?:AND|OR)\s+', re.IGNORECASE)
+_AGG_FUNCTIONS = {
+    "SUM": "Adds up all values",
+    "AVG": "Calculates average value",
+    "COUNT": "Counts number of records",
+    "MAX": "Finds maximum value",
+    "MIN": "Finds minimum value"
+}
+_AGG_RES = {func: re.compile(rf'{func}\s*\(([^)]+)\)', re.IGNORECASE) for func in _AGG_FUNCTIONS}
+_GROUP_BY_RE = re.compile(r'GROUP BY\s+(.+?)(?:HAVING|ORDER BY|LIMIT|;|$)', re.IGNORECASE)
+_ORDER_BY_RE = re.compile(r'ORDER BY\s+(.+?)(?:LIMIT|;|$)', re.IGNORECASE)
+_SORT_DIRECTION_RE = re.compile(r'\s+(ASC|DESC)', re.IGNORECASE)
+_LIMIT_RE = re.compile(r'LIMIT\s+(\d+)', re.IGNORECASE)
+# Keywords behind the overview, complexity and tips heuristics, found in one scan
+_KEYWORD_RE = re.compile(
+    r'\b(select\s+\*|(?:select|where|group\s+by|having|order\s+by|limit|join|case|sum|between|subquery)\b)',
+    re.IGNORECASE
+)
+
+
 class SQLExplainer:
     """Explains SQL queries in simple terms."""
     
@@ -25,30 +56,55 @@ class SQLExplainer:
         Returns:
             Dictionary with query explanation
         """
+        # Deep-copy the memoized explanation so callers cannot mutate the shared cache entry
+        return copy.deepcopy(_explain_cached(sql_query))
+    
+    def _explain(self, sql_query: str) -> Dict[str, str]:
+        """Build the explanation; a pure function of the SQL text."""
+        features = self._scan_keywords(sql_query)
+        
         explanation = {
-            "overview": self._get_overview(sql_query),
+            "overview": self._get_overview(sql_query, features),
             "tables": self._explain_tables(sql_query),
             "joins": self._explain_joins(sql_query),
             "filters": self._explain_filters(sql_query),
             "aggregations": self._explain_aggregations(sql_query),
             "ordering": self._explain_ordering(sql_query),
-            "complexity": self._assess_complexity(sql_query),
-            "tips": self._get_tips(sql_query)
+            "complexity": self._assess_complexity(sql_query, features),
+            "tips": self._get_tips(sql_query, features)
         }
         
         return explanation
     
-    def _get_overview(self, sql_query: str) -> str:
+    def _scan_keywords(self, sql_query: str) -> Counter:
+        """
+        Count heuristic keywords in a single pass over the query.
+        
+        Multi-word keywords are normalized to single spaces, and "select *"
+        also counts as a "select".
+        
+        Args:
+            sql_query: SQL query to scan
+            
+        Returns:
+            Counter of lowercase keywords
+        """
+        features = Counter(" ".join(match.lower().split()) for match in _KEYWORD_RE.findall(sql_query))
+        features["select"] += features["select *"]
+        return features
+    
+    def _get_overview(self, sql_query: str, features: Optional[Counter] = None) -> str:
         """Get high-level overview of what query does."""
-        query_lower = sql_query.lower()
+        if features is None:
+            features = self._scan_keywords(sql_query)
         
-        if "group by" in query_lower and "sum" in query_lower:
+        if features["group by"] and features["sum"]:
             return "This query aggregates data to calculate totals grouped by categories"
-        elif "join" in query_lower:
+        elif features["join"]:
             return "This query combines data from multiple related tables"
-        elif "where" in query_lower and "between" in query_lower:
+        elif features["where"] and features["between"]:
             return "This query filters data within a specific range"
-        elif "order by" in query_lower and "limit" in query_lower:
+        elif features["order by"] and features["limit"]:
             return "This query ranks and returns top results"
         else:
             return "This query retrieves data from the database"
@@ -58,7 +114,7 @@ class SQLExplainer:
         tables = []
         
         # Extract FROM clause
-        from_match = re.search(r'FROM\s+(\w+)', sql_query, re.IGNORECASE)
+        from_match = _FROM_RE.search(sql_query)
         if from_match:
             table_name = from_match.group(1)
             tables.append({
@@ -68,7 +124,7 @@ class SQLExplainer:
             })
         
         # Extract JOIN tables
-        join_matches = re.finditer(r'JOIN\s+(\w+)', sql_query, re.IGNORECASE)
+        join_matches = _JOIN_TABLE_RE.finditer(sql_query)
         for match in join_matches:
             table_name = match.group(1)
             tables.append({
@@ -83,14 +139,8 @@ class SQLExplainer:
         """Explain how tables are connected."""
         joins = []
         
-        join_patterns = [
-            (r'(INNER\s+)?JOIN\s+(\w+)\s+ON\s+([^WHERE^GROUP^ORDER^;]+)', 'INNER JOIN'),
-            (r'LEFT\s+JOIN\s+(\w+)\s+ON\s+([^WHERE^GROUP^ORDER^;]+)', 'LEFT JOIN'),
-            (r'RIGHT\s+JOIN\s+(\w+)\s+ON\s+([^WHERE^GROUP^ORDER^;]+)', 'RIGHT JOIN')
-        ]
-        
-        for pattern, join_type in join_patterns:
-            matches = re.finditer(pattern, sql_query, re.IGNORECASE)
+        for pattern, join_type in _JOIN_PATTERNS:
+            matches = pattern.finditer(sql_query)
             for match in matches:
                 if join_type == 'INNER JOIN':
                     table = match.group(2)
@@ -122,12 +172,12 @@ class SQLExplainer:
         """Explain WHERE clause filters."""
         filters = []
         
-        where_match = re.search(r'WHERE\s+(.+?)(?:GROUP BY|ORDER BY|LIMIT|;|$)', sql_query, re.IGNORECASE | re.DOTALL)
+        where_match = _WHERE_RE.search(sql_query)
         if where_match:
             where_clause = where_match.group(1).strip()
             
             # Split by AND/OR
-            conditions = re.split(r'\s+(?:AND|OR)\s+', where_clause, flags=re.IGNORECASE)
+            conditions = _AND_OR_SPLIT_RE.split(where_clause)
             
             for condition in conditions:
                 filters.append({
@@ -156,17 +206,8 @@ class SQLExplainer:
         """Explain aggregation functions."""
         aggregations = []
         
-        agg_functions = {
-            "SUM": "Adds up all values",
-            "AVG": "Calculates average value",
-            "COUNT": "Counts number of records",
-            "MAX": "Finds maximum value",
-            "MIN": "Finds minimum value"
-        }
-        
-        for func, explanation in agg_functions.items():
-            pattern = rf'{func}\s*\(([^)]+)\)'
-            matches = re.finditer(pattern, sql_query, re.IGNORECASE)
+        for func, explanation in _AGG_FUNCTIONS.items():
+            matches = _AGG_RES[func].finditer(sql_query)
             for match in matches:
                 column = match.group(1).strip()
                 aggregations.append({
@@ -176,7 +217,7 @@ class SQLExplainer:
                 })
         
         # Check for GROUP BY
-        group_match = re.search(r'GROUP BY\s+(.+?)(?:HAVING|ORDER BY|LIMIT|;|$)', sql_query, re.IGNORECASE)
+        group_match = _GROUP_BY_RE.search(sql_query)
         if group_match:
             group_cols = group_match.group(1).strip()
             aggregations.append({
@@ -191,11 +232,11 @@ class SQLExplainer:
         """Explain ORDER BY and LIMIT."""
         ordering = {}
         
-        order_match = re.search(r'ORDER BY\s+(.+?)(?:LIMIT|;|$)', sql_query, re.IGNORECASE)
+        order_match = _ORDER_BY_RE.search(sql_query)
         if order_match:
             order_clause = order_match.group(1).strip()
             direction = "descending" if "DESC" in order_clause.upper() else "ascending"
-            column = re.sub(r'\s+(ASC|DESC)', '', order_clause, flags=re.IGNORECASE).strip()
+            column = _SORT_DIRECTION_RE.sub('', order_clause).strip()
             
             ordering["order_by"] = {
                 "column": column,
@@ -203,7 +244,7 @@ class SQLExplainer:
                 "purpose": f"Sorts results by {column} in {direction} order"
             }
         
-        limit_match = re.search(r'LIMIT\s+(\d+)', sql_query, re.IGNORECASE)
+        limit_match = _LIMIT_RE.search(sql_query)
         if limit_match:
             limit_value = limit_match.group(1)
             ordering["limit"] = {
@@ -213,32 +254,33 @@ class SQLExplainer:
         
         return ordering
     
-    def _assess_complexity(self, sql_query: str) -> Dict[str, any]:  # type: ignore
+    def _assess_complexity(self, sql_query: str, features: Optional[Counter] = None) -> Dict[str, any]:  # type: ignore
         """Assess query complexity."""
         complexity_score = 0
         factors = []
         
-        query_lower = sql_query.lower()
+        if features is None:
+            features = self._scan_keywords(sql_query)
         
         # Count complexity factors
-        if "join" in query_lower:
-            join_count = query_lower.count("join")
+        if features["join"]:
+            join_count = features["join"]
             complexity_score += join_count * 2
             factors.append(f"{join_count} table join(s)")
         
-        if "group by" in query_lower:
+        if features["group by"]:
             complexity_score += 2
             factors.append("Aggregation with grouping")
         
-        if "having" in query_lower:
+        if features["having"]:
             complexity_score += 1
             factors.append("Post-aggregation filtering")
         
-        if "subquery" in query_lower or query_lower.count("select") > 1:
+        if features["subquery"] or features["select"] > 1:
             complexity_score += 3
             factors.append("Subqueries")
         
-        if "case" in query_lower:
+        if features["case"]:
             complexity_score += 2
             factors.append("Conditional logic")
         
@@ -260,27 +302,34 @@ class SQLExplainer:
             "factors": factors
         }
     
-    def _get_tips(self, sql_query: str) -> List[str]:
+    def _get_tips(self, sql_query: str, features: Optional[Counter] = None) -> List[str]:
         """Get tips for improving the query."""
         tips = []
-        query_lower = sql_query.lower()
+        if features is None:
+            features = self._scan_keywords(sql_query)
         
-        if "select *" in query_lower:
+        if features["select *"]:
             tips.append("💡 Specify only needed columns instead of SELECT * for better performance")
         
-        if "join" in query_lower and "where" not in query_lower:
+        if features["join"] and not features["where"]:
             tips.append("💡 Consider adding WHERE clauses to filter data before joining")
         
-        if query_lower.count("join") > 2:
+        if features["join"] > 2:
             tips.append("💡 Multiple joins can be slow - consider if all are necessary")
         
-        if "group by" in query_lower and "having" not in query_lower:
+        if features["group by"] and not features["having"]:
             tips.append("💡 Use HAVING clause to filter aggregated results")
         
-        if "order by" in query_lower and "limit" not in query_lower:
+        if features["order by"] and not features["limit"]:
             tips.append("💡 Add LIMIT when sorting to improve performance")
         
         if not tips:
             tips.append("✅ Query looks well-optimized!")
         
         return tips
+
+
+@functools.lru_cache(maxsize=512)
+def _explain_cached(sql_query: str) -> Dict[str, str]:
+    """Memoized explanation shared by all SQLExplainer instances."""
+    return SQLExplainer()._explain(sql_query)
@@ -1,10 +1,14 @@
 """
 SQL query validation before execution.
 """
+import functools
 import re
 from typing import Dict, List, Any
 
 
+_SELECT_STAR_RE = re.compile(r'\bSELECT\s+\*\b', re.IGNORECASE)
+
+
 class SQLValidator:
     """Validate SQL queries for safety and correctness."""
     
@@ -22,6 +26,12 @@ class SQLValidator:
         r'--',  # SQL comments (potential injection)
     ]
     
+    # One alternation over every dangerous pattern: a single scan clears safe queries
+    _DANGEROUS_ANY = re.compile(
+        '|'.join(f'(?:{pattern})' for pattern in DANGEROUS_PATTERNS),
+        re.IGNORECASE
+    )
+    
     def __init__(self):
         self.dangerous_regex = [re.compile(pattern, re.IGNORECASE) 
                                for pattern in self.DANGEROUS_PATTERNS]
@@ -36,13 +46,24 @@ class SQLValidator:
         Returns:
             Dict with 'valid', 'errors', 'warnings'
         """
+        # Copy the memoized lists so callers cannot mutate the shared cache entry
+        result = _validate_cached(sql)
+        return {
+            'valid': result['valid'],
+            'errors': list(result['errors']),
+            'warnings': list(result['warnings'])
+        }
+    
+    def _validate(self, sql: str) -> Dict[str, Any]:
+        """Run every check; a pure function of the SQL text."""
         errors: List[str] = []
         warnings: List[str] = []
         
-        # Check for dangerous operations
-        for pattern in self.dangerous_regex:
-            if pattern.search(sql):
-                errors.append(f"Dangerous operation detected: {pattern.pattern}")
+        # Check for dangerous operations; individual patterns only run to name a hit
+        if self._DANGEROUS_ANY.search(sql):
+            for pattern in self.dangerous_regex:
+                if pattern.search(sql):
+                    errors.append(f"Dangerous operation detected: {pattern.pattern}")
         
         # Check for basic SQL syntax
         if not sql.strip().upper().startswith(('SELECT', 'WITH')):
@@ -57,11 +78,12 @@ class SQLValidator:
             warnings.append("Multiple statements detected - only first will execute")
         
         # Check for SELECT *
-        if re.search(r'\bSELECT\s+\*\b', sql, re.IGNORECASE):
+        if _SELECT_STAR_RE.search(sql):
             warnings.append("Using SELECT * - consider specifying columns explicitly")
         
         # Check for missing WHERE in large tables
-        if 'orders' in sql.lower() and 'where' not in sql.lower():
+        sql_lower = sql.lower()
+        if 'orders' in sql_lower and 'where' not in sql_lower:
             warnings.append("Large table query without WHERE clause - may be slow")
         
         return {
@@ -69,3 +91,9 @@ class SQLValidator:
             'errors': errors,
             'warnings': warnings
         }
+
+
+@functools.lru_cache(maxsize=512)
+def _validate_cached(sql: str) -> Dict[str, Any]:
+    """Memoized validation shared by all SQLValidator instances."""
+    return SQLValidator()._validate(sql)
@@ -0,0 +1,72 @@
+"""
+Route questions that match a pre-built query template straight to its SQL.
+"""
+from typing import Optional, Tuple
+import numpy as np
+
+from agent.query_templates import QueryTemplates
+
+
+class TemplateRouter:
+    """Match questions against template names/descriptions by embedding similarity."""
+    
+    def __init__(self, templates: Optional[QueryTemplates] = None, threshold: float = 0.85):
+        """
+        Initialize template router.
+        
+        Args:
+            templates: Template library to route to
+            threshold: Minimum cosine similarity for a template match
+        """
+        self.templates = templates or QueryTemplates()
+        self.threshold = threshold
+        
+        self._embedding_function = None
+        # One unit-length row per template, aligned with self._template_ids
+        self._matrix: Optional[np.ndarray] = None
+        self._template_ids = list(self.templates.get_all_templates())
+    
+    def _embed(self, texts: list) -> np.ndarray:
+        """Embed texts with the same local model the vector store uses, as unit rows."""
+        if self._embedding_function is None:
+            from utils.embeddings import get_embedding_function
+            self._embedding_function = get_embedding_function()
+        vectors = np.asarray(self._embedding_function(texts), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+    
+    def match(self, question: str) -> Optional[Tuple[str, str]]:
+        """
+        Find the template a question asks for, if any.
+        
+        Args:
+            question: User's natural language question
+            
+        Returns:
+            Tuple of (template_id, SQL) for a confident match, otherwise None
+        """
+        try:
+            if self._matrix is None:
+                # Embedded once on first use
+                all_templates = self.templates.get_all_templates()
+                self._matrix = self._embed([
+                    f"{all_templates[tid]['name']}: {all_templates[tid]['description']}"
+                    for tid in self._template_ids
+                ])
+            scores = self._matrix @ self._embed([question])[0]
+        except Exception as e:
+            print(f"⚠️  Template matching failed: {e}")
+            return None
+        
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        
+        template_id = self._template_ids[best]
+        # Drop the explanatory comment lines; the validator rejects "--"
+        sql = "\n".join(
+            line for line in self.templates.get_template(template_id)["query"].splitlines()
+            if not line.lstrip().startswith("--")
+        )
+        return template_id, sql.strip()
@@ -4,7 +4,9 @@ Agent tools module.
 Defines tools for the SQL agent to use.
 """
 
+from functools import cached_property
 from typing import Dict, Any, Tuple
+import io
 import pandas as pd
 from langchain_core.tools import Tool
 
@@ -13,14 +15,54 @@ from rag.vector_store import VectorStore
 from agent.error_handler import SQLErrorHandler
 
 
+# Rows included in execute_sql output; the full count is still reported
+MAX_RESULT_ROWS = 1000
+
+# Longer text values are cut in tool output so one wide cell cannot flood the prompt
+MAX_CELL_CHARS = 100
+
+
+def _write_tsv(df: pd.DataFrame, buffer: io.StringIO, max_cell_chars: int = MAX_CELL_CHARS):
+    """
+    Write a DataFrame as tab-separated text with long text values truncated.
+    
+    Args:
+        df: DataFrame to write (already row-capped by the caller)
+        buffer: Buffer to append to
+        max_cell_chars: Maximum characters kept per text value
+    """
+    truncated = {}
+    for col in df.select_dtypes(include=["object", "string"]).columns:
+        values = df[col]
+        too_long = values.str.len() > max_cell_chars
+        if too_long.any():
+            truncated[col] = values.mask(too_long, values.str.slice(0, max_cell_chars) + "...")
+    if truncated:
+        df = df.assign(**truncated)
+    df.to_csv(buffer, sep="\t", index=False)
+
+
 class SQLAgentTools:
     """Collection of tools for the SQL agent."""
     
     def __init__(self):
-        """Initialize agent tools."""
-        self.db_manager = DatabaseManager()
-        self.vector_store = VectorStore()
-        self.error_handler = SQLErrorHandler(self.db_manager)
+        """Initialize agent tools (backing components are created on first use)."""
+        self._tools = None
+    
+    @cached_property
+    def db_manager(self) -> DatabaseManager:
+        """Database manager, connected the first time a tool needs it."""
+        return DatabaseManager()
+    
+    @cached_property
+    def vector_store(self) -> VectorStore:
+        """Schema vector store, loaded the first time a tool needs it."""
+        return VectorStore()
+    
+    @cached_property
+    def error_handler(self) -> SQLErrorHandler:
+        """Error handler sharing this instance's database manager."""
+        return SQLErrorHandler(self.db_manager)
     
     def search_schema_tool(self, query: str) -> str:
         """
@@ -45,7 +87,7 @@ class SQLAgentTools:
         Returns:
             Query results as string or error message
         """
-        df, error = self.db_manager.execute_query(sql_query)
+        df, total_rows, error = self.db_manager.execute_query_preview(sql_query, max_rows=MAX_RESULT_ROWS)
         
         if error:
             return f"Error executing query: {error}"
@@ -53,11 +95,14 @@ class SQLAgentTools:
         if df.empty:
             return "Query executed successfully but returned no results."
         
-        # Format results as string
-        result = f"Query executed successfully. Found {len(df)} rows.\n\n"
-        result += df.to_string(index=False)
+        # Format results as tab-separated text (C-level CSV writer, one buffer)
+        buffer = io.StringIO()
+        buffer.write(f"Query executed successfully. Found {total_rows} rows.\n\n")
+        if total_rows > len(df):
+            buffer.write(f"Showing the first {len(df)} rows.\n\n")
+        _write_tsv(df, buffer)
         
-        return result
+        return buffer.getvalue()
     
     def get_table_info_tool(self, table_name: str) -> str:
         """
@@ -73,14 +118,16 @@ class SQLAgentTools:
             schema = self.db_manager.get_table_schema(table_name)
             sample_df = self.db_manager.get_sample_data(table_name, limit=3)
             
-            result = f"Table: {table_name}\n"
-            result += "=" * 50 + "\n\n"
-            result += "Columns:\n"
+            buffer = io.StringIO()
+            buffer.write(f"Table: {table_name}\n")
+            buffer.write("=" * 50 + "\n\n")
+            buffer.write("Columns:\n")
             for col in schema:
-                result += f"  - {col['name']} ({col['type']})\n"
-            result += f"\nSample data:\n{sample_df.to_string(index=False)}\n"
+                buffer.write(f"  - {col['name']} ({col['type']})\n")
+            buffer.write("\nSample data:\n")
+            _write_tsv(sample_df, buffer)
             
-            return result
+            return buffer.getvalue()
         except Exception as e:
             return f"Error getting table info: {str(e)}"
     
@@ -110,7 +157,11 @@ class SQLAgentTools:
         Returns:
             List of LangChain Tool objects
         """
-        tools = [
+        # Tool definitions never change, so build them once per instance
+        if self._tools is not None:
+            return list(self._tools)
+        
+        self._tools = [
             Tool(
                 name="search_schema",
                 func=self.search_schema_tool,
@@ -150,4 +201,4 @@ class SQLAgentTools:
             )
         ]
         
-        return tools
+        return list(self._tools)
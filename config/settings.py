@@ -6,6 +6,7 @@ API keys, database paths, and LLM settings.
 """
 
 import os
+from functools import cached_property
 from typing import Optional
 from pathlib import Path
 from dotenv import load_dotenv
@@ -15,45 +16,93 @@ load_dotenv()
 
 
 class Settings:
-    """Application settings and configuration."""
+    """
+    Application settings and configuration.
+    
+    Environment-derived values are read on first access and cached on the
+    instance; call reload() after changing the environment to re-read them.
+    """
     
     # Project root directory
     ROOT_DIR: Path = Path(__file__).parent.parent
     
+    # Chroma Vector DB Configuration
+    CHROMA_COLLECTION_NAME: str = "database_schema"
+    
+    # Streamlit Configuration
+    APP_TITLE: str = "SQL Data Analyst Agent"
+    APP_ICON: str = "📊"
+    
     # Groq Configuration
-    GROQ_API_KEY: str = os.getenv("GROQ_API_KEY", "")
-    LLM_MODEL: str = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
-    LLM_TEMPERATURE: float = float(os.getenv("LLM_TEMPERATURE", "0.0"))
+    @cached_property
+    def GROQ_API_KEY(self) -> str:
+        return os.getenv("GROQ_API_KEY", "")
+    
+    @cached_property
+    def LLM_MODEL(self) -> str:
+        return os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
+    
+    @cached_property
+    def LLM_TEMPERATURE(self) -> float:
+        return float(os.getenv("LLM_TEMPERATURE", "0.0"))
     
     # Database Configuration
-    DATABASE_PATH: Path = ROOT_DIR / os.getenv("DATABASE_PATH", "data/sales_analytics.db")
+    @cached_property
+    def DATABASE_PATH(self) -> Path:
+        return self.ROOT_DIR / os.getenv("DATABASE_PATH", "data/sales_analytics.db")
     
     # Chroma Vector DB Configuration
-    CHROMA_PERSIST_DIR: Path = ROOT_DIR / os.getenv("CHROMA_PERSIST_DIR", "data/chroma_db")
-    CHROMA_COLLECTION_NAME: str = "database_schema"
+    @cached_property
+    def CHROMA_PERSIST_DIR(self) -> Path:
+        return self.ROOT_DIR / os.getenv("CHROMA_PERSIST_DIR", "data/chroma_db")
     
     # Agent Configuration
-    MAX_REPAIR_ATTEMPTS: int = int(os.getenv("MAX_REPAIR_ATTEMPTS", "3"))
+    @cached_property
+    def MAX_REPAIR_ATTEMPTS(self) -> int:
+        return int(os.getenv("MAX_REPAIR_ATTEMPTS", "3"))
     
-    # Streamlit Configuration
-    APP_TITLE: str = "SQL Data Analyst Agent"
-    APP_ICON: str = "📊"
+    @cached_property
+    def MAX_RESULT_ROWS(self) -> int:
+        return int(os.getenv("MAX_RESULT_ROWS", "500000"))
+    
+    @cached_property
+    def FULL_SCHEMA_MAX_CHARS(self) -> int:
+        return int(os.getenv("FULL_SCHEMA_MAX_CHARS", "8000"))
+    
+    @cached_property
+    def TEMPLATE_MATCH_THRESHOLD(self) -> float:
+        return float(os.getenv("TEMPLATE_MATCH_THRESHOLD", "0.85"))
+    
+    # Cache Configuration
+    @cached_property
+    def SEMANTIC_CACHE_THRESHOLD(self) -> float:
+        return float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+    
+    @cached_property
+    def SQL_CACHE_PATH(self) -> Path:
+        return self.ROOT_DIR / os.getenv("SQL_CACHE_PATH", "data/sql_cache.db")
+    
+    @cached_property
+    def SQL_CACHE_TTL_SECONDS(self) -> int:
+        return int(os.getenv("SQL_CACHE_TTL_SECONDS", "86400"))
+    
+    def reload(self) -> None:
+        """Forget cached values so they are re-read from the environment."""
+        self.__dict__.clear()
     
-    @classmethod
-    def validate(cls) -> None:
+    def validate(self) -> None:
         """Validate that all required settings are present."""
-        if not cls.GROQ_API_KEY:
+        if not self.GROQ_API_KEY:
             raise ValueError(
                 "GROQ_API_KEY not found in environment variables. "
                 "Please copy .env.example to .env and add your Groq API key. "
                 "Get one free at: https://console.groq.com/keys"
             )
     
-    @classmethod
-    def ensure_directories(cls) -> None:
+    def ensure_directories(self) -> None:
         """Ensure all required directories exist."""
-        cls.DATABASE_PATH.parent.mkdir(parents=True, exist_ok=True)
-        cls.CHROMA_PERSIST_DIR.mkdir(parents=True, exist_ok=True)
+        self.DATABASE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        self.CHROMA_PERSIST_DIR.mkdir(parents=True, exist_ok=True)
 
 
 # Create a singleton instance
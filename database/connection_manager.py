@@ -3,13 +3,88 @@ Multi-database connection manager.
 """
 import sqlite3
 import pandas as pd
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Iterable, Tuple
 import sqlalchemy
-from sqlalchemy import create_engine, inspect
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.exc import SQLAlchemyError
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 import os
 import shutil
 from pathlib import Path
+import importlib.util
+from functools import lru_cache
+import re
+import threading
+from datetime import date, datetime
+
+
+# python-calamine reads Excel files much faster than openpyxl when installed
+_EXCEL_ENGINE = "calamine" if importlib.util.find_spec("python_calamine") else None
+
+# Rows per DataFrame when streaming Excel sheets into SQLite
+EXCEL_CHUNK_ROWS = 50000
+
+# Any run of characters outside [a-z0-9] (underscores included) collapses to one underscore
+_NON_IDENTIFIER_RE = re.compile(r'[^a-z0-9]+')
+
+
+def _convert_calamine_cell(value: Any) -> Any:
+    """Convert a python-calamine cell the way pandas.read_excel does."""
+    if value == '':
+        return None  # Empty cell -> NaN
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    return value
+
+
+def _sanitize_table_name(raw: str, prefix: str) -> str:
+    """Turn a file or sheet name into a safe lowercase SQL table name."""
+    table_name = _NON_IDENTIFIER_RE.sub('_', raw.lower()).strip('_')
+    if not table_name or table_name[0].isdigit():  # Ensure valid start
+        table_name = f'{prefix}_{table_name}'
+    return table_name
+
+
+@lru_cache(maxsize=128)
+def _detect_db_type(connection_string: str) -> str:
+    """Map a connection string or database file path to its database type."""
+    if connection_string.endswith(('.db', '.sqlite', '.sqlite3')):
+        return 'sqlite'
+    
+    parsed = urlparse(connection_string)
+    db_type = parsed.scheme.split('+')[0] if parsed.scheme else 'unknown'
+    return db_type
+
+
+# Per-connection SQLite settings for uploaded files: memory-mapped reads (256 MB),
+# a 64 MB page cache and in-memory temp tables for sorts and GROUP BYs
+_SQLITE_READ_PRAGMAS = (
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+def _create_sqlite_engine(db_path: Path) -> sqlalchemy.Engine:
+    """Create an engine for an uploaded SQLite file, tuned for analytical reads."""
+    engine = create_engine(f'sqlite:///{db_path}')
+    
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        try:
+            # WAL is stored in the file; the other settings apply per connection
+            cursor.execute("PRAGMA journal_mode=WAL")
+            for pragma in _SQLITE_READ_PRAGMAS:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+    
+    return engine
 
 
 class DatabaseConnectionManager:
@@ -26,17 +101,17 @@ class DatabaseConnectionManager:
     def __init__(self):
         self.connections: Dict[str, Dict[str, Any]] = {}
         self.schemas: Dict[str, Dict] = {}
+        # Engines for connection strings are shared by every session using the same URL
+        self._engine_cache: Dict[URL, sqlalchemy.Engine] = {}
+        self._engine_refs: Dict[URL, int] = {}
+        # The manager is shared by every Streamlit session (st.cache_resource)
+        self._engine_lock = threading.Lock()
         self.upload_dir = Path("data/uploads")
         self.upload_dir.mkdir(parents=True, exist_ok=True)
     
     def detect_db_type(self, connection_string: str) -> str:
         """Auto-detect database type from connection string."""
-        if connection_string.endswith(('.db', '.sqlite', '.sqlite3')):
-            return 'sqlite'
-        
-        parsed = urlparse(connection_string)
-        db_type = parsed.scheme.split('+')[0] if parsed.scheme else 'unknown'
-        return db_type
+        return _detect_db_type(connection_string)
     
     def connect_database(self, 
                         session_id: str,
@@ -80,7 +155,7 @@ class DatabaseConnectionManager:
         actual_db_path = file_path  # Track the actual database file path
         
         if uploaded_file.name.endswith(('.db', '.sqlite', '.sqlite3')):
-            engine = create_engine(f'sqlite:///{file_path}')
+            engine = _create_sqlite_engine(file_path)
             db_type = 'sqlite'
             actual_db_path = file_path
             
@@ -88,51 +163,49 @@ class DatabaseConnectionManager:
             # Convert CSV to SQLite
             df = pd.read_csv(file_path)
             sqlite_path = file_path.with_suffix('.db')
-            engine = create_engine(f'sqlite:///{sqlite_path}')
             
             # Infer table name from filename - sanitize for SQL
-            import re
-            table_name = file_path.stem.lower()
-            table_name = re.sub(r'[^a-z0-9_]', '_', table_name)  # Replace invalid chars with underscore
-            table_name = re.sub(r'_+', '_', table_name)  # Remove consecutive underscores
-            table_name = table_name.strip('_')  # Remove leading/trailing underscores
-            if not table_name or table_name[0].isdigit():  # Ensure valid start
-                table_name = 'table_' + table_name
+            table_name = _sanitize_table_name(file_path.stem, 'table')
             
-            df.to_sql(table_name, engine, index=False, if_exists='replace')
+            self._bulk_load(sqlite_path, [(table_name, df)])
+            engine = _create_sqlite_engine(sqlite_path)
             db_type = 'sqlite'
             actual_db_path = sqlite_path  # Use the converted DB path
             
         elif uploaded_file.name.endswith(('.xlsx', '.xls')):
             # Convert Excel to SQLite
-            excel_file = pd.ExcelFile(file_path)
             sqlite_path = file_path.with_suffix('.db')
-            engine = create_engine(f'sqlite:///{sqlite_path}')
             
-            # Each sheet becomes a table
-            import re
-            for sheet_name in excel_file.sheet_names:
-                df = pd.read_excel(excel_file, sheet_name=sheet_name)
-                # Sanitize sheet name for SQL
-                table_name = str(sheet_name).lower()
-                table_name = re.sub(r'[^a-z0-9_]', '_', table_name)  # Replace invalid chars
-                table_name = re.sub(r'_+', '_', table_name)  # Remove consecutive underscores
-                table_name = table_name.strip('_')  # Remove leading/trailing underscores
-                if not table_name or table_name[0].isdigit():  # Ensure valid start
-                    table_name = 'sheet_' + table_name
+            if _EXCEL_ENGINE == "calamine":
+                # Stream rows in fixed-size chunks instead of parsing whole sheets
+                self._bulk_load(sqlite_path, self._iter_excel_chunks(file_path))
+            else:
+                excel_file = pd.ExcelFile(file_path)
+                
+                # Each sheet becomes a table (sheet names sanitized for SQL)
+                tables = [
+                    (_sanitize_table_name(str(sheet_name), 'sheet'), sheet_name)
+                    for sheet_name in excel_file.sheet_names
+                ]
                 
-                df.to_sql(table_name, engine, index=False, if_exists='replace')
+                # Sheets are read one at a time as they are written
+                self._bulk_load(sqlite_path, (
+                    (table_name, pd.read_excel(excel_file, sheet_name=sheet_name))
+                    for table_name, sheet_name in tables
+                ))
+            engine = _create_sqlite_engine(sqlite_path)
             db_type = 'sqlite'
             actual_db_path = sqlite_path  # Use the converted DB path
             
         else:
             raise ValueError(f"Unsupported file type: {uploaded_file.name}")
         
-        # Store connection
+        # Store connection, releasing whatever this session used before
+        self._release_engine(session_id)
         self.connections[session_id] = {'engine': engine, 'db_type': db_type}
         
         # Discover schema
-        schema = self._discover_schema(engine)
+        schema = self._discover_schema(engine, db_type)
         self.schemas[session_id] = schema
         
         return {
@@ -148,20 +221,27 @@ class DatabaseConnectionManager:
     def _handle_connection_string(self, session_id: str, connection_string: str) -> Dict[str, Any]:
         """Handle database connection via connection string."""
         
-        # Create engine
-        engine = create_engine(connection_string)
+        # Create engine (or reuse the pooled one for this URL), holding a
+        # reference so no other session disposes it while we test it
+        url = make_url(connection_string)
+        engine = self._acquire_engine(url)
         
         # Test connection
-        with engine.connect() as conn:
-            conn.execute(sqlalchemy.text("SELECT 1"))
+        try:
+            with engine.connect() as conn:
+                conn.execute(sqlalchemy.text("SELECT 1"))
+        except Exception:
+            self._release_url(url)
+            raise
         
         db_type = self.detect_db_type(connection_string)
         
-        # Store connection
-        self.connections[session_id] = {'engine': engine, 'db_type': db_type}
+        # Store connection, releasing whatever this session used before
+        self._release_engine(session_id)
+        self.connections[session_id] = {'engine': engine, 'db_type': db_type, 'url': url}
         
         # Discover schema
-        schema = self._discover_schema(engine)
+        schema = self._discover_schema(engine, db_type)
         self.schemas[session_id] = schema
         
         return {
@@ -173,32 +253,232 @@ class DatabaseConnectionManager:
             'connection_type': 'remote'
         }
     
-    def _discover_schema(self, engine: sqlalchemy.Engine) -> Dict:
+    def _iter_excel_chunks(self, file_path: Path) -> Iterable[Tuple[str, pd.DataFrame]]:
+        """
+        Yield (table name, DataFrame) chunks of every sheet using python-calamine.
+        
+        Only EXCEL_CHUNK_ROWS rows of one sheet are held in memory at a time.
+        The first row of each sheet is the header; empty sheets are skipped.
+        """
+        from python_calamine import CalamineWorkbook
+        
+        workbook = CalamineWorkbook.from_path(str(file_path))
+        for sheet_name in workbook.sheet_names:
+            table_name = _sanitize_table_name(str(sheet_name), 'sheet')
+            rows = workbook.get_sheet_by_name(sheet_name).iter_rows()
+            header = next(rows, None)
+            if not header:
+                continue
+            
+            # Name blank and repeated headers the way pandas.read_excel does
+            columns, seen = [], {}
+            for i, name in enumerate(header):
+                name = str(name) if name not in (None, '') else f'Unnamed: {i}'
+                if name in seen:
+                    seen[name] += 1
+                    name = f'{name}.{seen[name]}'
+                else:
+                    seen[name] = 0
+                columns.append(name)
+            
+            # Dtypes inferred from the first chunk are applied to later ones
+            dtypes = None
+            
+            def to_frame(batch):
+                nonlocal dtypes
+                frame = pd.DataFrame(batch, columns=columns)
+                if dtypes is None:
+                    dtypes = frame.dtypes
+                    return frame
+                for column, dtype in dtypes.items():
+                    if frame[column].dtype != dtype:
+                        try:
+                            frame[column] = frame[column].astype(dtype)
+                        except (TypeError, ValueError):
+                            pass  # e.g. an int column that gained blanks stays float
+                return frame
+            
+            batch = []
+            yielded = False
+            for row in rows:
+                batch.append([_convert_calamine_cell(cell) for cell in row])
+                if len(batch) >= EXCEL_CHUNK_ROWS:
+                    yield table_name, to_frame(batch)
+                    batch = []
+                    yielded = True
+            if batch or not yielded:
+                yield table_name, to_frame(batch)
+    
+    def _bulk_load(self, sqlite_path: Path, tables: Iterable[Tuple[str, pd.DataFrame]]):
+        """
+        Write DataFrames into a SQLite file in one transaction.
+        
+        Uses a raw sqlite3 connection (pandas then batches rows with
+        executemany) with journaling and fsync off: the file is a fresh
+        conversion target, so a crash mid-load just means re-uploading.
+        Repeated table names are appended, so a table can arrive in chunks.
+        """
+        conn = sqlite3.connect(sqlite_path)
+        written = set()
+        try:
+            conn.execute("PRAGMA journal_mode=OFF")
+            conn.execute("PRAGMA synchronous=OFF")
+            for table_name, df in tables:
+                if_exists = 'append' if table_name in written else 'replace'
+                df.to_sql(table_name, conn, index=False, if_exists=if_exists)
+                written.add(table_name)
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def _create_pooled_engine(self, url: URL) -> sqlalchemy.Engine:
+        """Create an engine whose pooled connections are validated and recycled."""
+        if url.get_backend_name() == 'sqlite':
+            return create_engine(url, pool_pre_ping=True)
+        return create_engine(url, pool_pre_ping=True, pool_size=8, pool_recycle=1800)
+    
+    def _release_engine(self, session_id: str):
+        """Drop a session's engine, disposing shared engines when their last session leaves."""
+        conn_info = self.connections.pop(session_id, None)
+        if not conn_info:
+            return
+        
+        url = conn_info.get('url')
+        if url is None:
+            conn_info['engine'].dispose()
+            return
+        
+        self._release_url(url)
+    
+    def _acquire_engine(self, url: URL) -> sqlalchemy.Engine:
+        """Get (creating if needed) the shared engine for a URL and take a reference to it."""
+        with self._engine_lock:
+            engine = self._engine_cache.get(url)
+            if engine is None:
+                engine = self._create_pooled_engine(url)
+                self._engine_cache[url] = engine
+            self._engine_refs[url] = self._engine_refs.get(url, 0) + 1
+            return engine
+    
+    def _release_url(self, url: URL):
+        """Drop one reference to a shared engine, disposing it after the last one."""
+        with self._engine_lock:
+            self._engine_refs[url] -= 1
+            if self._engine_refs[url] > 0:
+                return
+            del self._engine_refs[url]
+            engine = self._engine_cache.pop(url)
+        engine.dispose()
+    
+    def _discover_schema(self, engine: sqlalchemy.Engine, db_type: str = 'unknown') -> Dict:
         """Discover basic schema information."""
         inspector = inspect(engine)
         schema = {}
         
-        for table_name in inspector.get_table_names():
-            columns = inspector.get_columns(table_name)
-            foreign_keys = inspector.get_foreign_keys(table_name)
-            
-            # Get row count
-            try:
-                with engine.connect() as conn:
-                    result = conn.execute(sqlalchemy.text(f"SELECT COUNT(*) FROM {table_name}"))
-                    row_count = result.scalar() or 0
-            except:
-                row_count = 0
+        table_names = inspector.get_table_names()
+        row_counts = self._get_row_counts(engine, db_type, table_names)
+        
+        # Reflect every table at once; dialects with catalog queries (e.g.
+        # PostgreSQL) answer each of these in a single round trip
+        all_columns = inspector.get_multi_columns()
+        all_foreign_keys = inspector.get_multi_foreign_keys()
+        
+        for table_name in table_names:
+            columns = all_columns.get((None, table_name), [])
+            foreign_keys = all_foreign_keys.get((None, table_name), [])
             
             schema[table_name] = {
                 'columns': columns,
                 'foreign_keys': foreign_keys,
                 'column_names': [col['name'] for col in columns],
-                'row_count': row_count
+                'row_count': row_counts.get(table_name, 0)
             }
         
         return schema
     
+    def _get_row_counts(self, engine: sqlalchemy.Engine, db_type: str, table_names: List[str]) -> Dict[str, int]:
+        """
+        Get row counts for display, preferring the database's own statistics.
+        
+        Catalog estimates (PostgreSQL reltuples, MySQL table_rows, SQLite
+        sqlite_stat1) avoid a full scan per table; tables without statistics
+        are counted with batched, identifier-quoted COUNT(*) queries, run
+        concurrently on separate pooled connections for server databases.
+        """
+        counts: Dict[str, int] = {}
+        
+        with engine.connect() as conn:
+            try:
+                if db_type == 'postgresql':
+                    result = conn.execute(sqlalchemy.text(
+                        "SELECT c.relname, c.reltuples::bigint FROM pg_class c "
+                        "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                        "WHERE c.relkind = 'r' AND n.nspname = current_schema()"
+                    ))
+                    # reltuples is -1 (or 0) until the table has been analyzed
+                    counts = {name: int(rows) for name, rows in result if rows and rows > 0}
+                elif db_type == 'mysql':
+                    result = conn.execute(sqlalchemy.text(
+                        "SELECT table_name, table_rows FROM information_schema.tables "
+                        "WHERE table_schema = DATABASE()"
+                    ))
+                    counts = {name: int(rows) for name, rows in result if rows}
+                elif db_type == 'sqlite':
+                    has_stats = conn.execute(sqlalchemy.text(
+                        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+                    )).first()
+                    if has_stats:
+                        # The first number of each index's stat string is the table's row count
+                        result = conn.execute(sqlalchemy.text("SELECT tbl, stat FROM sqlite_stat1"))
+                        for name, stat in result:
+                            counts[name] = max(counts.get(name, 0), int(str(stat).split()[0]))
+            except (SQLAlchemyError, ValueError, IndexError):
+                # Missing catalog access or a malformed stat string: count everything
+                counts = {}
+        
+        missing = [table_name for table_name in table_names if table_name not in counts]
+        
+        # Count the rest in UNION ALL batches: one round-trip per 20 tables
+        batches = [missing[start:start + 20] for start in range(0, len(missing), 20)]
+        if db_type == 'sqlite' or len(batches) <= 1:
+            # Local file: nothing to overlap, so keep to one thread
+            for batch in batches:
+                counts.update(self._count_rows(engine, batch))
+        else:
+            # Overlap round-trip latency; the engine pool hands each thread its own connection
+            with ThreadPoolExecutor(max_workers=min(8, len(batches))) as executor:
+                for batch_counts in executor.map(lambda batch: self._count_rows(engine, batch), batches):
+                    counts.update(batch_counts)
+        
+        return counts
+    
+    def _count_rows(self, engine: sqlalchemy.Engine, table_names: List[str]) -> Dict[str, int]:
+        """Count rows of a batch of tables with one UNION ALL query (0 for unreadable tables)."""
+        quote = engine.dialect.identifier_preparer.quote
+        union_sql = " UNION ALL ".join(
+            f"SELECT :t{i} AS table_name, COUNT(*) AS row_count FROM {quote(table_name)}"
+            for i, table_name in enumerate(table_names)
+        )
+        params = {f"t{i}": table_name for i, table_name in enumerate(table_names)}
+        counts: Dict[str, int] = {}
+        
+        with engine.connect() as conn:
+            try:
+                counts.update({name: rows or 0 for name, rows in conn.execute(sqlalchemy.text(union_sql), params)})
+            except SQLAlchemyError:
+                # One unreadable table fails the batch; count the batch table by table
+                conn.rollback()
+                for table_name in table_names:
+                    try:
+                        result = conn.execute(sqlalchemy.text(f"SELECT COUNT(*) FROM {quote(table_name)}"))
+                        counts[table_name] = result.scalar() or 0
+                    except SQLAlchemyError:
+                        conn.rollback()
+                        counts[table_name] = 0
+        
+        return counts
+    
+    
     def get_connection(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get database connection for session."""
         return self.connections.get(session_id)
@@ -217,9 +497,7 @@ class DatabaseConnectionManager:
     
     def disconnect(self, session_id: str):
         """Disconnect and cleanup session."""
-        if session_id in self.connections:
-            self.connections[session_id]['engine'].dispose()
-            del self.connections[session_id]
+        self._release_engine(session_id)
         
         if session_id in self.schemas:
             del self.schemas[session_id]
@@ -5,6 +5,7 @@ Handles database connections, query execution, and error handling.
 """
 
 import sqlite3
+import threading
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
 import pandas as pd
@@ -12,6 +13,40 @@ import pandas as pd
 from config.settings import settings
 
 
+# Applied to every file-backed connection: WAL lets readers run alongside a
+# writer, NORMAL sync is safe under WAL, and a 64 MB cache keeps hot pages resident
+SQLITE_PRAGMAS = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA cache_size=-64000;
+PRAGMA busy_timeout=30000;
+"""
+
+
+# Tables counted per UNION ALL statement in get_row_counts
+COUNT_BATCH_SIZE = 20
+
+# Schema name under which each connection attaches the materialized-view database
+MATERIALIZED_SCHEMA = "mv"
+
+
+def materialized_db_path(db_path: Path) -> Path:
+    """
+    Get the side database holding a database's materialized summary tables.
+    
+    Keeping them out of the analytics database keeps them out of schema
+    listings, signatures and the LLM's schema context.
+    """
+    db_path = Path(db_path)
+    return db_path.with_name(f"{db_path.stem}_mv{db_path.suffix or '.db'}")
+
+
+def _quote_identifier(name: str) -> str:
+    """Quote a table or column name for use in SQLite SQL."""
+    return '"' + name.replace('"', '""') + '"'
+
+
 class DatabaseManager:
     """Manages database connections and query execution."""
     
@@ -23,6 +58,53 @@ class DatabaseManager:
             db_path: Path to the SQLite database file
         """
         self.db_path = db_path
+        # One long-lived connection per thread keeps SQLite's page cache warm
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a read-only autocommit connection with the tuned PRAGMAs applied."""
+        conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        if str(self.db_path) != ":memory:":
+            conn.executescript(SQLITE_PRAGMAS)
+            # Materialized template results are read as mv.<table>
+            conn.execute(
+                f"ATTACH DATABASE ? AS {MATERIALIZED_SCHEMA}",
+                (str(materialized_db_path(self.db_path)),)
+            )
+        # Autocommit would persist any write that slipped past the validator;
+        # these connections only ever read
+        conn.execute("PRAGMA query_only=ON")
+        return conn
+    
+    def _get_conn(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    def close_thread_connection(self):
+        """Close the calling thread's connection, e.g. before a short-lived thread exits."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._connections_lock:
+            self._connections.remove(conn)
+        conn.close()
+    
+    def close(self):
+        """Close every connection opened by this manager."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
     
     def execute_query(self, query: str) -> Tuple[pd.DataFrame, Optional[str]]:
         """
@@ -35,13 +117,42 @@ class DatabaseManager:
             Tuple of (DataFrame with results, error message if any)
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            df = pd.read_sql_query(query, conn)
-            conn.close()
+            df = pd.read_sql_query(query, self._get_conn())
             return df, None
         except Exception as e:
             return pd.DataFrame(), str(e)
     
+    def execute_query_preview(self, query: str, max_rows: int = 1000) -> Tuple[pd.DataFrame, int, Optional[str]]:
+        """
+        Execute a SQL query, keeping only the first rows and counting the rest.
+        
+        Rows past max_rows are streamed from the cursor and counted without
+        being held in memory.
+        
+        Args:
+            query: SQL query string to execute
+            max_rows: Maximum number of rows to return
+            
+        Returns:
+            Tuple of (DataFrame with the first rows, total row count, error message if any)
+        """
+        try:
+            cursor = self._get_conn().execute(query)
+            try:
+                columns = [desc[0] for desc in cursor.description] if cursor.description else []
+                rows = cursor.fetchmany(max_rows)
+                total = len(rows)
+                while True:
+                    batch = cursor.fetchmany(10_000)
+                    if not batch:
+                        break
+                    total += len(batch)
+            finally:
+                cursor.close()
+            return pd.DataFrame.from_records(rows, columns=columns), total, None
+        except Exception as e:
+            return pd.DataFrame(), 0, str(e)
+    
     def get_table_names(self) -> List[str]:
         """
         Get list of all table names in the database.
@@ -49,11 +160,8 @@ class DatabaseManager:
         Returns:
             List of table names
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        cursor = self._get_conn().execute("SELECT name FROM sqlite_master WHERE type='table'")
         tables = [row[0] for row in cursor.fetchall()]
-        conn.close()
         return tables
     
     def get_table_schema(self, table_name: str) -> List[Dict[str, Any]]:
@@ -66,9 +174,7 @@ class DatabaseManager:
         Returns:
             List of column information dictionaries
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(f"PRAGMA table_info({table_name})")
+        cursor = self._get_conn().execute(f"PRAGMA table_info({_quote_identifier(table_name)})")
         columns = []
         for row in cursor.fetchall():
             columns.append({
@@ -79,9 +185,33 @@ class DatabaseManager:
                 "default_value": row[4],
                 "primary_key": bool(row[5])
             })
-        conn.close()
         return columns
     
+    def get_all_columns(self) -> List[Tuple[str, str, str]]:
+        """
+        Get every column of every table with a single metadata query.
+        
+        Returns:
+            List of (table name, column name, column type) tuples
+        """
+        cursor = self._get_conn().execute(
+            "SELECT m.name, p.name, p.type "
+            "FROM sqlite_master m JOIN pragma_table_info(m.name) p "
+            "WHERE m.type = 'table' "
+            "ORDER BY m.name, p.cid"
+        )
+        columns = cursor.fetchall()
+        return columns
+    
+    def get_schema_version(self) -> int:
+        """
+        Get the SQLite schema version, which changes on every DDL statement.
+        
+        Returns:
+            Schema version counter
+        """
+        return self._get_conn().execute("PRAGMA schema_version").fetchone()[0]
+    
     def get_sample_data(self, table_name: str, limit: int = 5) -> pd.DataFrame:
         """
         Get sample rows from a table.
@@ -93,9 +223,11 @@ class DatabaseManager:
         Returns:
             DataFrame with sample rows
         """
-        query = f"SELECT * FROM {table_name} LIMIT {limit}"
-        df, _ = self.execute_query(query)
-        return df
+        query = f"SELECT * FROM {_quote_identifier(table_name)} LIMIT ?"
+        try:
+            return pd.read_sql_query(query, self._get_conn(), params=(limit,))
+        except Exception:
+            return pd.DataFrame()
     
     def validate_query(self, query: str) -> Tuple[bool, Optional[str]]:
         """
@@ -108,15 +240,36 @@ class DatabaseManager:
             Tuple of (is_valid, error_message)
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
             # Use EXPLAIN to validate without executing
-            cursor.execute(f"EXPLAIN {query}")
-            conn.close()
+            self._get_conn().execute(f"EXPLAIN {query}").close()
             return True, None
         except Exception as e:
             return False, str(e)
     
+    def get_row_counts(self, tables: Optional[List[str]] = None) -> Dict[str, int]:
+        """
+        Count the rows of every table.
+        
+        Args:
+            tables: Tables to count (defaults to all tables)
+            
+        Returns:
+            Dictionary of table name to row count
+        """
+        tables = self.get_table_names() if tables is None else tables
+        conn = self._get_conn()
+        
+        # UNION ALL batches (SQLite caps compound SELECTs at 500 terms)
+        row_counts: Dict[str, int] = {}
+        for start in range(0, len(tables), COUNT_BATCH_SIZE):
+            batch = tables[start:start + COUNT_BATCH_SIZE]
+            union_sql = " UNION ALL ".join(
+                f"SELECT ? AS table_name, COUNT(*) FROM {_quote_identifier(table)}"
+                for table in batch
+            )
+            row_counts.update(conn.execute(union_sql, batch).fetchall())
+        return row_counts
+    
     def get_database_summary(self) -> Dict[str, Any]:
         """
         Get a comprehensive summary of the database.
@@ -129,19 +282,22 @@ class DatabaseManager:
             "table_count": len(tables),
             "tables": {}
         }
+        if not tables:
+            return summary
+        
+        row_counts = self.get_row_counts(tables)
+        
+        # All columns in one metadata query
+        columns: Dict[str, List[str]] = {table: [] for table in tables}
+        for table, column, _ in self.get_all_columns():
+            if table in columns:
+                columns[table].append(column)
         
         for table in tables:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute(f"SELECT COUNT(*) FROM {table}")
-            row_count = cursor.fetchone()[0]
-            conn.close()
-            
-            schema = self.get_table_schema(table)
             summary["tables"][table] = {
-                "row_count": row_count,
-                "column_count": len(schema),
-                "columns": [col["name"] for col in schema]
+                "row_count": row_counts.get(table, 0),
+                "column_count": len(columns[table]),
+                "columns": columns[table]
             }
         
         return summary
@@ -12,6 +12,7 @@ from typing import List, Tuple
 import random
 
 from config.settings import settings
+from database.db_manager import SQLITE_PRAGMAS
 
 
 class DatabaseSetup:
@@ -27,10 +28,22 @@ class DatabaseSetup:
         self.db_path = db_path
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
     
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open a connection with the shared SQLite PRAGMAs applied.
+        
+        The connection is in autocommit mode; writers open their own
+        transaction so all their statements are committed (and synced) once.
+        """
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        conn.executescript(SQLITE_PRAGMAS)
+        return conn
+    
     def create_schema(self) -> None:
         """Create the database schema with all tables."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
         
         # Create customers table
         cursor.execute("""
@@ -86,8 +99,9 @@ class DatabaseSetup:
     
     def populate_sample_data(self) -> None:
         """Populate the database with sample sales data."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
         
         # Sample data
         customers_data = [
@@ -140,18 +154,20 @@ class DatabaseSetup:
         
         start_date = datetime.now() - timedelta(days=180)
         
+        # Look up prices once instead of querying per order item
+        prices = dict(cursor.execute("SELECT id, price FROM products"))
+        
+        # Orders get explicit ids so their items can be built before any insert
+        first_order_id = cursor.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM orders").fetchone()[0]
+        orders_batch = []
+        items_batch = []
+        
         for i in range(100):  # 100 orders
+            order_id = first_order_id + i
             customer_id = random.choice(customer_ids)
             order_date = start_date + timedelta(days=random.randint(0, 180))
             status = random.choice(statuses)
             
-            # Insert order
-            cursor.execute(
-                "INSERT INTO orders (customer_id, order_date, status, total_amount) VALUES (?, ?, ?, ?)",
-                (customer_id, order_date.isoformat(), status, 0.0)  # Total will be updated
-            )
-            order_id = cursor.lastrowid
-            
             # Add 1-4 items per order
             num_items = random.randint(1, 4)
             total_amount = 0.0
@@ -159,23 +175,21 @@ class DatabaseSetup:
             for _ in range(num_items):
                 product_id = random.choice(product_ids)
                 quantity = random.randint(1, 5)
-                
-                # Get product price
-                cursor.execute("SELECT price FROM products WHERE id = ?", (product_id,))
-                unit_price = cursor.fetchone()[0]
+                unit_price = prices[product_id]
                 
                 total_amount += unit_price * quantity
-                
-                cursor.execute(
-                    "INSERT INTO order_items (order_id, product_id, quantity, unit_price) VALUES (?, ?, ?, ?)",
-                    (order_id, product_id, quantity, unit_price)
-                )
+                items_batch.append((order_id, product_id, quantity, unit_price))
             
-            # Update order total
-            cursor.execute(
-                "UPDATE orders SET total_amount = ? WHERE id = ?",
-                (total_amount, order_id)
-            )
+            orders_batch.append((order_id, customer_id, order_date.isoformat(), status, total_amount))
+        
+        cursor.executemany(
+            "INSERT INTO orders (id, customer_id, order_date, status, total_amount) VALUES (?, ?, ?, ?, ?)",
+            orders_batch
+        )
+        cursor.executemany(
+            "INSERT INTO order_items (order_id, product_id, quantity, unit_price) VALUES (?, ?, ?, ?)",
+            items_batch
+        )
         
         conn.commit()
         conn.close()
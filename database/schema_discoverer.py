@@ -1,111 +1,186 @@
 """
 Automatic schema discovery and analysis.
 """
+import copy
+import hashlib
+import threading
+import time
 import sqlalchemy
 from sqlalchemy import inspect, text
-import pandas as pd
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
+
+
+# Seconds a discovered schema (with its row counts and column stats) is reused
+SCHEMA_CACHE_TTL_SECONDS = 3600
+
+# (database URL, schema fingerprint) -> (schema, discovery time)
+_schema_cache: Dict[Tuple[str, str], Tuple[Dict[str, Any], float]] = {}
+_schema_cache_lock = threading.Lock()
+
+# Catalog queries whose output changes whenever a table or column does
+_FINGERPRINT_QUERIES = {
+    'sqlite': "SELECT type, name, sql FROM sqlite_master ORDER BY type, name",
+    'postgresql': (
+        "SELECT table_name, column_name, data_type FROM information_schema.columns "
+        "WHERE table_schema = current_schema() ORDER BY table_name, ordinal_position"
+    ),
+    'mysql': (
+        "SELECT table_name, column_name, data_type FROM information_schema.columns "
+        "WHERE table_schema = DATABASE() ORDER BY table_name, ordinal_position"
+    ),
+}
 
 
 class SchemaDiscoverer:
     """Discover and analyze database schemas dynamically."""
     
     def discover_full_schema(self, engine: sqlalchemy.Engine) -> Dict[str, Any]:
-        """Discover complete database schema with metadata."""
+        """
+        Discover complete database schema with metadata.
+        
+        Results are reused for the same database until its schema fingerprint
+        changes or SCHEMA_CACHE_TTL_SECONDS pass, so repeated session starts
+        skip the sampling and per-column statistics scans.
+        """
+        fingerprint = self._schema_fingerprint(engine)
+        if fingerprint is None:
+            return self._discover(engine)
         
+        key = (str(engine.url), fingerprint)
+        with _schema_cache_lock:
+            cached = _schema_cache.get(key)
+        if cached is not None and time.time() - cached[1] < SCHEMA_CACHE_TTL_SECONDS:
+            return copy.deepcopy(cached[0])
+        
+        schema = self._discover(engine)
+        with _schema_cache_lock:
+            _schema_cache[key] = (copy.deepcopy(schema), time.time())
+        return schema
+    
+    def _schema_fingerprint(self, engine: sqlalchemy.Engine) -> Optional[str]:
+        """Hash the database catalog, or None if the dialect is not supported."""
+        query = _FINGERPRINT_QUERIES.get(engine.dialect.name)
+        if query is None:
+            return None
+        try:
+            with engine.connect() as conn:
+                rows = conn.execute(text(query)).fetchall()
+        except sqlalchemy.exc.SQLAlchemyError:
+            return None
+        return hashlib.md5(repr(rows).encode()).hexdigest()
+    
+    def _discover(self, engine: sqlalchemy.Engine) -> Dict[str, Any]:
+        """Run full schema discovery against the database."""
         inspector = inspect(engine)
         schema = {}
         
         # Get all tables
         table_names = inspector.get_table_names()
         
-        for table_name in table_names:
-            # Get columns
-            columns = inspector.get_columns(table_name)
-            
-            # Get foreign keys
-            foreign_keys = inspector.get_foreign_keys(table_name)
-            
-            # Get indexes
-            indexes = inspector.get_indexes(table_name)
-            
-            # Get row count
-            row_count = self._get_row_count(engine, table_name)
-            
-            # Sample data for better understanding
-            sample_data = self._get_sample_data(engine, table_name)
-            
-            # Analyze columns
-            column_stats = self._analyze_columns(engine, table_name, columns)
-            
-            schema[table_name] = {
-                'columns': columns,
-                'foreign_keys': foreign_keys,
-                'indexes': indexes,
-                'row_count': row_count,
-                'sample_data': sample_data,
-                'column_stats': column_stats,
-                'column_names': [col['name'] for col in columns]
-            }
+        # Reflect columns, foreign keys and indexes of every table at once
+        all_columns = inspector.get_multi_columns()
+        all_foreign_keys = inspector.get_multi_foreign_keys()
+        all_indexes = inspector.get_multi_indexes()
+        
+        # Data queries for all tables share one connection
+        with engine.connect() as conn:
+            for table_name in table_names:
+                key = (None, table_name)
+                columns = all_columns.get(key, [])
+                
+                # Get row count
+                row_count = self._get_row_count(conn, table_name)
+                
+                # Sample data for better understanding
+                sample_data = self._get_sample_data(conn, table_name)
+                
+                # Analyze columns
+                column_stats = self._analyze_columns(conn, table_name, columns)
+                
+                schema[table_name] = {
+                    'columns': columns,
+                    'foreign_keys': all_foreign_keys.get(key, []),
+                    'indexes': all_indexes.get(key, []),
+                    'row_count': row_count,
+                    'sample_data': sample_data,
+                    'column_stats': column_stats,
+                    'column_names': [col['name'] for col in columns]
+                }
         
         return schema
     
-    def _get_row_count(self, engine: sqlalchemy.Engine, table_name: str) -> int:
+    def _get_row_count(self, conn: sqlalchemy.Connection, table_name: str) -> int:
         """Get total row count for table."""
         try:
-            with engine.connect() as conn:
-                result = conn.execute(text(f"SELECT COUNT(*) FROM {table_name}"))
-                count = result.scalar()
-                return int(count) if count is not None else 0
-        except:
+            quote = conn.dialect.identifier_preparer.quote
+            result = conn.execute(text(f"SELECT COUNT(*) FROM {quote(table_name)}"))
+            count = result.scalar()
+            return int(count) if count is not None else 0
+        except Exception:
+            conn.rollback()  # Keep the shared connection usable for the next table
             return 0
     
-    def _get_sample_data(self, engine: sqlalchemy.Engine, table_name: str, limit: int = 3) -> List[Dict]:
+    def _get_sample_data(self, conn: sqlalchemy.Connection, table_name: str, limit: int = 3) -> List[Dict]:
         """Get sample rows from table."""
         try:
-            query = f"SELECT * FROM {table_name} LIMIT {limit}"
-            df = pd.read_sql(query, engine)
-            return df.to_dict('records')
-        except:
+            quote = conn.dialect.identifier_preparer.quote
+            query = text(f"SELECT * FROM {quote(table_name)} LIMIT :limit")
+            # A few rows need no DataFrame: read plain row mappings
+            rows = conn.execute(query, {'limit': limit}).mappings().fetchall()
+            return [dict(row) for row in rows]
+        except Exception:
+            conn.rollback()
             return []
     
-    def _analyze_columns(self, engine: sqlalchemy.Engine, table_name: str, columns: List[Any]) -> Dict:  # type: ignore
-        """Analyze column statistics."""
-        stats = {}
+    def _analyze_columns(self, conn: sqlalchemy.Connection, table_name: str, columns: List[Any]) -> Dict:  # type: ignore
+        """Analyze column statistics with one aggregate query over the table."""
+        quote = conn.dialect.identifier_preparer.quote
+        select_parts = []
+        column_fields = []
         
-        for column in columns:
-            col_name = column['name']
+        for i, column in enumerate(columns):
+            col_name = quote(column['name'])
             col_type = str(column['type']).upper()
             
-            try:
-                # Check if numeric
-                if any(t in col_type for t in ['INT', 'FLOAT', 'DECIMAL', 'NUMERIC', 'REAL', 'DOUBLE']):
-                    # Numeric column stats
-                    query = f"""
-                    SELECT 
-                        COUNT(*) as count,
-                        COUNT(DISTINCT {col_name}) as unique_count,
-                        MIN({col_name}) as min_value,
-                        MAX({col_name}) as max_value,
-                        AVG({col_name}) as avg_value
-                    FROM {table_name}
-                    WHERE {col_name} IS NOT NULL
-                    """
-                else:
-                    # Text/Date column stats
-                    query = f"""
-                    SELECT 
-                        COUNT(*) as count,
-                        COUNT(DISTINCT {col_name}) as unique_count,
-                        COUNT(*) - COUNT({col_name}) as null_count
-                    FROM {table_name}
-                    """
-                
-                result = pd.read_sql(query, engine).iloc[0].to_dict()
-                stats[col_name] = result
-                
-            except Exception as e:
-                stats[col_name] = {'error': f'Analysis failed: {str(e)[:50]}'}
+            # Check if numeric
+            if any(t in col_type for t in ['INT', 'FLOAT', 'DECIMAL', 'NUMERIC', 'REAL', 'DOUBLE']):
+                # Numeric column stats (non-null values only)
+                fields = {
+                    'count': f"COUNT({col_name})",
+                    'unique_count': f"COUNT(DISTINCT {col_name})",
+                    'min_value': f"MIN({col_name})",
+                    'max_value': f"MAX({col_name})",
+                    'avg_value': f"AVG({col_name})",
+                }
+            else:
+                # Text/Date column stats
+                fields = {
+                    'count': "COUNT(*)",
+                    'unique_count': f"COUNT(DISTINCT {col_name})",
+                    'null_count': f"COUNT(*) - COUNT({col_name})",
+                }
+            
+            column_fields.append((column['name'], list(fields)))
+            select_parts.extend(f"{expr} AS c{i}_{field}" for field, expr in fields.items())
+        
+        if not select_parts:
+            return {}
+        
+        try:
+            row = conn.execute(text(f"SELECT {', '.join(select_parts)} FROM {quote(table_name)}")).one()
+        except Exception as e:
+            conn.rollback()
+            return {
+                col_name: {'error': f'Analysis failed: {str(e)[:50]}'}
+                for col_name, _ in column_fields
+            }
+        
+        # Slice the single result row back into per-column dictionaries
+        stats = {}
+        position = 0
+        for col_name, fields in column_fields:
+            stats[col_name] = dict(zip(fields, row[position:position + len(fields)]))
+            position += len(fields)
         
         return stats
     
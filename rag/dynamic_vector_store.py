@@ -1,32 +1,34 @@
 """
 Dynamic vector store management for multi-database support.
 """
+import hashlib
 import os
-import shutil
+import threading
+import numpy as np
 from typing import Optional, Dict
 from langchain_community.vectorstores import Chroma
-from langchain_groq import ChatGroq
 from langchain_community.embeddings import OpenAIEmbeddings
 from langchain.embeddings.base import Embeddings
 from database.schema_discoverer import SchemaDiscoverer
 import sqlalchemy
 
 
+# Sessions kept registered; Streamlit gives no hook when a browser session ends
+MAX_SESSIONS = 32
+
+
 class SimpleEmbeddings(Embeddings):
     """Simple hash-based embeddings as fallback."""
     
     def embed_documents(self, texts):
         """Embed documents using simple hashing."""
-        import hashlib
-        embeddings = []
-        for text in texts:
-            # Create a simple 384-dimensional embedding from hash
-            hash_obj = hashlib.sha384(text.encode())
-            hash_bytes = hash_obj.digest()
-            # Convert to floats between -1 and 1
-            embedding = [((b - 128) / 128.0) for b in hash_bytes]
-            embeddings.append(embedding)
-        return embeddings
+        if not texts:
+            return []
+        # Create a simple 48-dimensional embedding from each text's SHA-384 digest
+        digests = b"".join(hashlib.sha384(text.encode()).digest() for text in texts)
+        hash_bytes = np.frombuffer(digests, dtype=np.uint8).reshape(len(texts), 48)
+        # Convert to floats between -1 and 1 in one vectorized pass
+        return ((hash_bytes - 128.0) / 128.0).tolist()
     
     def embed_query(self, text):
         """Embed query using simple hashing."""
@@ -39,6 +41,14 @@ class DynamicVectorStore:
     def __init__(self, base_persist_dir: str = "session_vector_stores"):
         self.base_persist_dir = base_persist_dir
         self.stores: Dict[str, Chroma] = {}
+        # Stores are built once per schema fingerprint and shared by sessions
+        self._fingerprint_stores: Dict[str, Chroma] = {}
+        self._session_fingerprints: Dict[str, str] = {}
+        # Shared by every Streamlit session and background init thread: _lock
+        # guards the dicts above, and one build lock per fingerprint keeps two
+        # threads from indexing the same schema into the same directory
+        self._lock = threading.Lock()
+        self._build_locks: Dict[str, threading.Lock] = {}
         
         # Use simple embeddings (no TensorFlow dependencies)
         self.embeddings = SimpleEmbeddings()
@@ -52,69 +62,94 @@ class DynamicVectorStore:
         engine: sqlalchemy.Engine,
         force_rebuild: bool = False
     ) -> Chroma:
-        """Initialize vector store for a session from database schema."""
+        """
+        Initialize vector store for a session from database schema.
+        
+        The store is persisted under a fingerprint of the schema documents, so
+        sessions on the same database reuse it instead of re-embedding.
+        """
         
         # Check if already initialized
         if session_id in self.stores and not force_rebuild:
             return self.stores[session_id]
         
-        # Set up persist directory for this session
-        persist_dir = os.path.join(self.base_persist_dir, session_id)
-        
-        # If force rebuild, clear existing
-        if force_rebuild and os.path.exists(persist_dir):
-            shutil.rmtree(persist_dir)
-            os.makedirs(persist_dir, exist_ok=True)
-        
         # Discover schema
         discoverer = SchemaDiscoverer()
         schema = discoverer.discover_full_schema(engine)
         
         # Generate schema documents
         documents = discoverer.generate_schema_documents(schema)
+        fingerprint = hashlib.sha1("\n".join(documents).encode()).hexdigest()[:16]
+        
+        # Set up persist directory for this schema
+        persist_dir = os.path.join(self.base_persist_dir, fingerprint)
         
-        # Create vector store
-        vectorstore = Chroma.from_texts(
-            texts=documents,
-            embedding=self.embeddings,
-            persist_directory=persist_dir
-        )
+        with self._lock:
+            build_lock = self._build_locks.setdefault(fingerprint, threading.Lock())
         
-        # Cache the store
-        self.stores[session_id] = vectorstore
+        with build_lock:
+            with self._lock:
+                vectorstore = self._fingerprint_stores.get(fingerprint)
+            if vectorstore is None and os.path.exists(persist_dir):
+                # Built earlier (possibly by another run) for an identical schema
+                vectorstore = Chroma(
+                    embedding_function=self.embeddings,
+                    persist_directory=persist_dir
+                )
+            
+            # If force rebuild, clear existing (through the open client, which
+            # Chroma shares per directory, rather than deleting files under it)
+            if force_rebuild and vectorstore is not None:
+                vectorstore.delete_collection()
+                vectorstore = None
+            
+            if vectorstore is None:
+                # Create vector store
+                os.makedirs(persist_dir, exist_ok=True)
+                vectorstore = Chroma.from_texts(
+                    texts=documents,
+                    embedding=self.embeddings,
+                    persist_directory=persist_dir
+                )
+            
+            with self._lock:
+                self._fingerprint_stores[fingerprint] = vectorstore
+                
+                # Cache the store (sessions sharing a rebuilt store switch to the new one)
+                self._session_fingerprints.pop(session_id, None)
+                self._session_fingerprints[session_id] = fingerprint
+                for other_session, other_fingerprint in self._session_fingerprints.items():
+                    if other_fingerprint == fingerprint:
+                        self.stores[other_session] = vectorstore
+                
+                # Forget the least recently initialized sessions
+                while len(self._session_fingerprints) > MAX_SESSIONS:
+                    self._forget_session(next(iter(self._session_fingerprints)))
         
         return vectorstore
     
     def get_store(self, session_id: str) -> Optional[Chroma]:
         """Get existing vector store for session."""
-        
-        # Return from cache if available
-        if session_id in self.stores:
-            return self.stores[session_id]
-        
-        # Try to load from disk
-        persist_dir = os.path.join(self.base_persist_dir, session_id)
-        if os.path.exists(persist_dir):
-            vectorstore = Chroma(
-                embedding_function=self.embeddings,
-                persist_directory=persist_dir
-            )
-            self.stores[session_id] = vectorstore
-            return vectorstore
-        
-        return None
+        return self.stores.get(session_id)
     
     def cleanup_session(self, session_id: str):
-        """Clean up vector store for session."""
+        """
+        Clean up vector store for session.
         
-        # Remove from cache
-        if session_id in self.stores:
-            del self.stores[session_id]
+        The persisted store stays on disk for future sessions on the same
+        schema; it is only released from memory once no session uses it.
+        """
         
-        # Remove from disk
-        persist_dir = os.path.join(self.base_persist_dir, session_id)
-        if os.path.exists(persist_dir):
-            shutil.rmtree(persist_dir)
+        # Remove from cache
+        with self._lock:
+            self._forget_session(session_id)
+    
+    def _forget_session(self, session_id: str):
+        """Drop a session and, once unused, its store; the caller holds _lock."""
+        self.stores.pop(session_id, None)
+        fingerprint = self._session_fingerprints.pop(session_id, None)
+        if fingerprint is not None and fingerprint not in self._session_fingerprints.values():
+            self._fingerprint_stores.pop(fingerprint, None)
     
     def rebuild_store(self, session_id: str, engine: sqlalchemy.Engine) -> Chroma:
         """Rebuild vector store from scratch."""
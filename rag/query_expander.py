@@ -1,49 +1,111 @@
 """
 Query expansion for better RAG retrieval.
 """
-from typing import List
-from langchain_groq import ChatGroq
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
 from config.settings import settings
+from utils.llm_client import get_llm
+
+
+# Questions shorter than this are specific enough to search with as-is
+MIN_WORDS_TO_EXPAND = 6
+
+# Expansions kept, keyed by normalized question (least recently used evicted first)
+EXPANSION_CACHE_MAX_ENTRIES = 1024
+
+_NON_WORD_RE = re.compile(r'\W+')
+
+# One alternative per line, without list numbering/bullets ("1.", "2)", "-") or padding
+_ALTERNATIVE_LINE_RE = re.compile(r'^[ \t1-9.)-]*([^\s1-9.)-].*?)\s*$', re.MULTILINE)
+
+_expansion_cache: "OrderedDict[str, Tuple[str, ...]]" = OrderedDict()
+_expansion_cache_lock = threading.Lock()
+
+
+def _normalize_query(user_query: str) -> str:
+    """Lowercase a question and collapse punctuation/whitespace so near-duplicates share a key."""
+    return _NON_WORD_RE.sub(' ', user_query.lower()).strip()
+
+
+def _cached_alternatives(user_query: str) -> Tuple[str, ...]:
+    """
+    Get alternative phrasings, reusing earlier results for the same normalized question.
+    
+    Failures are not cached.
+    
+    Args:
+        user_query: Original user query
+        
+    Returns:
+        Up to 3 alternative phrasings
+    """
+    key = _normalize_query(user_query)
+    with _expansion_cache_lock:
+        alternatives = _expansion_cache.get(key)
+        if alternatives is not None:
+            _expansion_cache.move_to_end(key)
+            return alternatives
+    
+    alternatives = _generate_alternatives(user_query.strip())
+    with _expansion_cache_lock:
+        _expansion_cache[key] = alternatives
+        while len(_expansion_cache) > EXPANSION_CACHE_MAX_ENTRIES:
+            _expansion_cache.popitem(last=False)
+    return alternatives
+
+
+def _generate_alternatives(user_query: str) -> Tuple[str, ...]:
+    """
+    Ask the LLM for alternative phrasings.
+    
+    Args:
+        user_query: Original user query
+        
+    Returns:
+        Up to 3 alternative phrasings
+    """
+    prompt = f"""Given this data analysis question, generate 3 alternative ways to phrase it that mean the same thing. Focus on different SQL-related terms.
+
+Original Question: {user_query}
+
+Generate 3 alternative phrasings (one per line):
+"""
+    
+    llm = get_llm(settings.LLM_MODEL, settings.GROQ_API_KEY, 0.3)  # type: ignore
+    response = llm.invoke(prompt)
+    content = response.content if hasattr(response, 'content') else str(response)
+    content_str = str(content) if not isinstance(content, str) else content
+    
+    # Parse alternatives
+    return tuple(_ALTERNATIVE_LINE_RE.findall(content_str)[:3])
 
 
 class QueryExpander:
     """Expand user queries for better semantic search."""
     
     def __init__(self):
-        self.llm = ChatGroq(
-            model=settings.LLM_MODEL,  # type: ignore
-            api_key=settings.GROQ_API_KEY,  # type: ignore
-            temperature=0.3  # type: ignore
-        )
+        self.llm = get_llm(settings.LLM_MODEL, settings.GROQ_API_KEY, 0.3)  # type: ignore
     
     def expand_query(self, user_query: str) -> List[str]:
         """
         Generate alternative phrasings of the query.
         
+        Short questions skip the LLM call and are returned on their own.
+        
         Args:
             user_query: Original user query
             
         Returns:
             List of expanded queries including original
         """
-        prompt = f"""Given this data analysis question, generate 3 alternative ways to phrase it that mean the same thing. Focus on different SQL-related terms.
-
-Original Question: {user_query}
-
-Generate 3 alternative phrasings (one per line):
-"""
+        if len(user_query.split()) < MIN_WORDS_TO_EXPAND:
+            return [user_query]
         
         try:
-            response = self.llm.invoke(prompt)
-            content = response.content if hasattr(response, 'content') else str(response)
-            content_str = str(content) if not isinstance(content, str) else content
-            
-            # Parse alternatives
-            alternatives = [line.strip() for line in content_str.split('\n') if line.strip()]
-            alternatives = [alt.lstrip('123456789.-) ') for alt in alternatives]
-            
             # Return original + alternatives (max 4 total)
-            return [user_query] + alternatives[:3]
+            return [user_query] + list(_cached_alternatives(user_query))
             
         except Exception as e:
             print(f"Query expansion failed: {e}")
@@ -4,11 +4,54 @@ Schema loader module.
 Extracts database schema information and formats it for RAG indexing.
 """
 
-from typing import List, Dict, Any
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+from config.settings import settings
 from database.db_manager import DatabaseManager
 from database.db_setup import DatabaseSetup
 
 
+# Threads used to fetch per-table schema and sample rows concurrently
+SCHEMA_FETCH_WORKERS = 8
+
+# Static query pattern documentation indexed alongside the schema
+QUERY_PATTERNS = """
+# Common SQL Query Patterns
+
+## Aggregation Queries
+- Total sales: SELECT SUM(total_amount) FROM orders
+- Average order value: SELECT AVG(total_amount) FROM orders
+- Count by category: SELECT category, COUNT(*) FROM products GROUP BY category
+
+## Time-based Queries
+- Monthly sales: SELECT strftime('%Y-%m', order_date) as month, SUM(total_amount) FROM orders GROUP BY month
+- Sales by date: SELECT order_date, SUM(total_amount) FROM orders GROUP BY order_date
+
+## Join Queries
+- Customer orders: SELECT c.name, COUNT(o.id) FROM customers c JOIN orders o ON c.id = o.customer_id GROUP BY c.id
+- Product sales: SELECT p.name, SUM(oi.quantity) FROM products p JOIN order_items oi ON p.id = oi.product_id GROUP BY p.id
+
+## Filtering Queries
+- By status: SELECT * FROM orders WHERE status = 'completed'
+- By date range: SELECT * FROM orders WHERE order_date BETWEEN '2024-01-01' AND '2024-12-31'
+- By customer segment: SELECT * FROM customers WHERE segment = 'Enterprise'
+
+## Top N Queries
+- Top customers: SELECT customer_id, SUM(total_amount) as revenue FROM orders GROUP BY customer_id ORDER BY revenue DESC LIMIT 10
+- Best selling products: SELECT product_id, SUM(quantity) as total_qty FROM order_items GROUP BY product_id ORDER BY total_qty DESC LIMIT 5
+
+## Important Notes
+- Use strftime() for date formatting in SQLite
+- Always use meaningful aliases for readability
+- Include appropriate GROUP BY when using aggregation functions
+- Use JOIN to combine data from multiple tables
+- Use ORDER BY with LIMIT for top N queries
+"""
+
+
 class SchemaLoader:
     """Loads and formats database schema information for RAG."""
     
@@ -17,10 +60,67 @@ class SchemaLoader:
         self.db_manager = DatabaseManager()
         self.db_setup = DatabaseSetup()
     
-    def get_schema_documents(self) -> List[Dict[str, str]]:
+    def get_schema_signature(self) -> str:
+        """
+        Hash every table's columns and types plus the database file's change marker.
+        
+        The modification time and size of the database file (and its WAL
+        file) change with every committed write, so the cached sample-data
+        documents are rebuilt once the data changes without counting rows.
+        
+        Returns:
+            Hex digest that changes whenever a table, column or the data changes
+        """
+        columns = self.db_manager.get_all_columns()
+        db_path = Path(self.db_manager.db_path)
+        file_markers = [
+            (path.name, path.stat().st_mtime_ns, path.stat().st_size)
+            for path in (db_path, db_path.with_name(db_path.name + "-wal"))
+            if path.exists()
+        ]
+        return hashlib.sha1(json.dumps([columns, file_markers]).encode()).hexdigest()
+    
+    def _documents_cache_path(self, signature: str) -> Path:
+        """Path of the cached document list for a schema signature."""
+        return settings.CHROMA_PERSIST_DIR / f"schema_docs_{signature}.json"
+    
+    def get_schema_documents(self, signature: Optional[str] = None) -> List[Dict[str, str]]:
         """
         Extract schema information as documents for vector store.
         
+        Documents are cached on disk per schema signature, so an unchanged
+        schema is loaded from the cache instead of re-queried and re-formatted.
+        
+        Args:
+            signature: Schema signature, if the caller already computed it
+        
+        Returns:
+            List of document dictionaries with content and metadata
+        """
+        signature = signature or self.get_schema_signature()
+        cache_path = self._documents_cache_path(signature)
+        if cache_path.exists():
+            try:
+                return json.loads(cache_path.read_text())
+            except (OSError, ValueError):
+                pass  # Unreadable cache: rebuild it below
+        
+        documents = self._build_schema_documents()
+        
+        try:
+            # Keep only the current schema's cache file
+            for stale in cache_path.parent.glob("schema_docs_*.json"):
+                stale.unlink()
+            cache_path.write_text(json.dumps(documents))
+        except OSError as e:
+            print(f"⚠️  Could not cache schema documents: {e}")
+        
+        return documents
+    
+    def _build_schema_documents(self) -> List[Dict[str, str]]:
+        """
+        Query the database and format every schema document.
+        
         Returns:
             List of document dictionaries with content and metadata
         """
@@ -38,9 +138,15 @@ class SchemaLoader:
         # Add detailed information for each table
         tables = self.db_manager.get_table_names()
         
-        for table in tables:
+        # Fetch every table's schema and samples concurrently (DatabaseManager
+        # gives each worker thread its own connection), then format in order
+        fetched = []
+        if tables:
+            with ThreadPoolExecutor(max_workers=min(SCHEMA_FETCH_WORKERS, len(tables))) as executor:
+                fetched = list(executor.map(self._fetch_table_details, tables))
+        
+        for table, (schema, sample_df) in zip(tables, fetched):
             # Table schema document
-            schema = self.db_manager.get_table_schema(table)
             schema_text = self._format_table_schema(table, schema)
             
             documents.append({
@@ -53,7 +159,6 @@ class SchemaLoader:
             })
             
             # Sample data document
-            sample_df = self.db_manager.get_sample_data(table, limit=3)
             sample_text = self._format_sample_data(table, sample_df)
             
             documents.append({
@@ -77,6 +182,20 @@ class SchemaLoader:
         
         return documents
     
+    def _fetch_table_details(self, table_name: str) -> Tuple[List[Dict[str, Any]], Any]:
+        """
+        Fetch one table's column schema and sample rows.
+        
+        Args:
+            table_name: Name of the table
+            
+        Returns:
+            Tuple of (column information, sample DataFrame)
+        """
+        schema = self.db_manager.get_table_schema(table_name)
+        sample_df = self.db_manager.get_sample_data(table_name, limit=3)
+        return schema, sample_df
+    
     def _format_table_schema(self, table_name: str, schema: List[Dict[str, Any]]) -> str:
         """
         Format table schema as readable text.
@@ -128,35 +247,4 @@ class SchemaLoader:
         Returns:
             Query patterns documentation
         """
-        return """
-# Common SQL Query Patterns
-
-## Aggregation Queries
-- Total sales: SELECT SUM(total_amount) FROM orders
-- Average order value: SELECT AVG(total_amount) FROM orders
-- Count by category: SELECT category, COUNT(*) FROM products GROUP BY category
-
-## Time-based Queries
-- Monthly sales: SELECT strftime('%Y-%m', order_date) as month, SUM(total_amount) FROM orders GROUP BY month
-- Sales by date: SELECT order_date, SUM(total_amount) FROM orders GROUP BY order_date
-
-## Join Queries
-- Customer orders: SELECT c.name, COUNT(o.id) FROM customers c JOIN orders o ON c.id = o.customer_id GROUP BY c.id
-- Product sales: SELECT p.name, SUM(oi.quantity) FROM products p JOIN order_items oi ON p.id = oi.product_id GROUP BY p.id
-
-## Filtering Queries
-- By status: SELECT * FROM orders WHERE status = 'completed'
-- By date range: SELECT * FROM orders WHERE order_date BETWEEN '2024-01-01' AND '2024-12-31'
-- By customer segment: SELECT * FROM customers WHERE segment = 'Enterprise'
-
-## Top N Queries
-- Top customers: SELECT customer_id, SUM(total_amount) as revenue FROM orders GROUP BY customer_id ORDER BY revenue DESC LIMIT 10
-- Best selling products: SELECT product_id, SUM(quantity) as total_qty FROM order_items GROUP BY product_id ORDER BY total_qty DESC LIMIT 5
-
-## Important Notes
-- Use strftime() for date formatting in SQLite
-- Always use meaningful aliases for readability
-- Include appropriate GROUP BY when using aggregation functions
-- Use JOIN to combine data from multiple tables
-- Use ORDER BY with LIMIT for top N queries
-"""
+        return QUERY_PATTERNS
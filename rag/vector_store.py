@@ -4,12 +4,24 @@ Vector store module.
 Manages Chroma vector database for semantic search over database schema.
 """
 
-from typing import List, Dict, Any, Optional
+import functools
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
 import chromadb
-from chromadb.utils import embedding_functions
+import numpy as np
 
 from config.settings import settings
-from rag.schema_loader import SchemaLoader
+from rag.schema_loader import QUERY_PATTERNS, SchemaLoader
+from utils.embeddings import get_embedding_function
+
+
+# Distinct (query, n_results) searches remembered per vector store
+SEARCH_CACHE_MAX_ENTRIES = 256
+
+# Documents embedded per chunk while the previous chunk is written
+EMBED_CHUNK_SIZE = 32
 
 
 class VectorStore:
@@ -24,64 +36,159 @@ class VectorStore:
             path=str(settings.CHROMA_PERSIST_DIR)
         )
         
-        # Use Chroma's default embedding function (ONNX-based, no API key needed)
-        # This is lightweight and works without external dependencies
-        self.embedding_function = embedding_functions.DefaultEmbeddingFunction()
-        
-        # Get or create collection with default embeddings
-        self.collection = self.client.get_or_create_collection(
-            name=settings.CHROMA_COLLECTION_NAME,
-            embedding_function=self.embedding_function,
-            metadata={"description": "Database schema and documentation"}
-        )
+        # Shared local embedding function (no API key needed, loaded once per process)
+        self.embedding_function = get_embedding_function()
+        self.collection = self._get_or_create_collection()
         
         self.schema_loader = SchemaLoader()
+        
+        # Repeated searches skip query embedding and the HNSW search;
+        # cleared whenever the indexed documents change
+        self._search_cached = functools.lru_cache(maxsize=SEARCH_CACHE_MAX_ENTRIES)(self._query_schema)
+    
+    def _get_or_create_collection(self):
+        """Open the schema collection, recreating it if it was embedded with another model."""
+        try:
+            return self.client.get_or_create_collection(
+                name=settings.CHROMA_COLLECTION_NAME,
+                embedding_function=self.embedding_function,  # type: ignore
+                metadata={"description": "Database schema and documentation"}
+            )
+        except ValueError as e:
+            # Vectors from a different embedding function are not comparable; the
+            # collection is rebuilt from the schema by initialize_schema_embeddings
+            print(f"⚠️  Recreating schema collection: {e}")
+            self.client.delete_collection(settings.CHROMA_COLLECTION_NAME)
+            return self.client.get_or_create_collection(
+                name=settings.CHROMA_COLLECTION_NAME,
+                embedding_function=self.embedding_function,  # type: ignore
+                metadata={"description": "Database schema and documentation"}
+            )
     
     def initialize_schema_embeddings(self, force_refresh: bool = False) -> None:
         """
         Initialize vector store with database schema embeddings.
         
+        Documents are keyed by a hash of their content, so only documents
+        that are new since the last indexing get embedded; unchanged ones
+        keep their stored vectors and vanished ones are deleted.
+        
         Args:
-            force_refresh: If True, delete existing embeddings and recreate
+            force_refresh: If True, re-sync even if the schema signature matches
         """
-        # Check if collection already has documents
+        # Check if collection already has documents for the current schema
         existing_count = self.collection.count()
+        signature = self.schema_loader.get_schema_signature()
         
         if existing_count > 0 and not force_refresh:
-            print(f"✅ Vector store already initialized with {existing_count} documents")
-            return
-        
-        if force_refresh and existing_count > 0:
+            if (self.collection.metadata or {}).get("schema_signature") == signature:
+                print(f"✅ Vector store already initialized with {existing_count} documents")
+                return
+            print("🔄 Database schema changed since the last indexing")
+        elif force_refresh and existing_count > 0:
             print("🔄 Refreshing vector store...")
-            # Delete existing collection and recreate
-            self.client.delete_collection(settings.CHROMA_COLLECTION_NAME)
-            self.collection = self.client.get_or_create_collection(
-                name=settings.CHROMA_COLLECTION_NAME,
-                metadata={"description": "Database schema and documentation"}
-            )
         
         print("📚 Loading database schema...")
-        documents = self.schema_loader.get_schema_documents()
+        documents = self.schema_loader.get_schema_documents(signature)
         
-        print(f"🔢 Creating embeddings for {len(documents)} documents...")
+        # Stable content-hash IDs (identical documents collapse to one entry)
+        by_id = {}
+        for doc in documents:
+            doc_id = f"doc_{hashlib.sha1(doc['content'].encode()).hexdigest()[:16]}"
+            by_id.setdefault(doc_id, doc)
         
-        # Prepare data for Chroma
-        ids = [f"doc_{i}" for i in range(len(documents))]
-        contents = [doc["content"] for doc in documents]
-        metadatas = [doc["metadata"] for doc in documents]
+        existing_ids = set(self.collection.get(include=[])["ids"]) if existing_count else set()
+        stale_ids = list(existing_ids - by_id.keys())
+        
+        # Prepare data for Chroma in one pass over the new documents
+        new_ids, contents, metadatas = [], [], []
+        for doc_id, doc in by_id.items():
+            if doc_id not in existing_ids:
+                new_ids.append(doc_id)
+                contents.append(doc["content"])
+                metadatas.append(doc["metadata"])
+        
+        print(f"🔢 Creating embeddings for {len(new_ids)} new documents "
+              f"({len(by_id) - len(new_ids)} unchanged, {len(stale_ids)} removed)...")
         
-        # Add to collection
         try:
-            self.collection.add(
-                ids=ids,
-                documents=contents,
-                metadatas=metadatas
-            )
+            batch_size = self.client.get_max_batch_size()
+            for start in range(0, len(stale_ids), batch_size):
+                self.collection.delete(ids=stale_ids[start:start + batch_size])
+            
+            # Double-buffered: the next chunk is embedded on a worker thread
+            # while the current one is written to Chroma
+            chunk_size = min(EMBED_CHUNK_SIZE, batch_size)
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                pending = executor.submit(self._embed_documents, contents[:chunk_size]) if contents else None
+                for start in range(0, len(new_ids), chunk_size):
+                    end = start + chunk_size
+                    embeddings = pending.result()  # type: ignore
+                    if end < len(new_ids):
+                        pending = executor.submit(self._embed_documents, contents[end:end + chunk_size])
+                    self.collection.upsert(
+                        ids=new_ids[start:end],
+                        documents=contents[start:end],
+                        embeddings=embeddings,  # type: ignore
+                        metadatas=metadatas[start:end]
+                    )
+            # Remember which schema these embeddings describe
+            self.collection.modify(metadata={
+                "description": "Database schema and documentation",
+                "schema_signature": signature
+            })
         except Exception as e:
             print(f"⚠️  Warning: Could not create embeddings: {e}")
-            print("📝 Vector store will use default embeddings")
         
-        print(f"✅ Vector store initialized with {len(documents)} documents")
+        # Cached search results may reference removed or outdated documents
+        self._search_cached.cache_clear()
+        
+        print(f"✅ Vector store initialized with {len(by_id)} documents")
+    
+    def _query_patterns_embedding_path(self) -> Path:
+        """Path of the saved query patterns vector for the current text and embedder."""
+        key = hashlib.md5(
+            f"{type(self.embedding_function).__name__}:{QUERY_PATTERNS}".encode()
+        ).hexdigest()
+        return settings.CHROMA_PERSIST_DIR / f"query_patterns_{key}.npy"
+    
+    def _embed_documents(self, contents: List[str]) -> List[Any]:
+        """
+        Embed documents in one batched call.
+        
+        The static query patterns document is embedded once and saved to
+        disk, so schema refreshes only pay for the schema documents.
+        
+        Args:
+            contents: Document texts
+            
+        Returns:
+            One embedding per document, in order
+        """
+        if QUERY_PATTERNS not in contents:
+            return list(self.embedding_function(contents))
+        
+        pattern_index = contents.index(QUERY_PATTERNS)
+        cache_path = self._query_patterns_embedding_path()
+        pattern_embedding = None
+        if cache_path.exists():
+            try:
+                pattern_embedding = np.load(cache_path)
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Could not load query patterns embedding: {e}")
+        
+        if pattern_embedding is None:
+            embeddings = list(self.embedding_function(contents))
+            try:
+                np.save(cache_path, np.asarray(embeddings[pattern_index]))
+            except OSError as e:
+                print(f"⚠️  Could not save query patterns embedding: {e}")
+            return embeddings
+        
+        others = contents[:pattern_index] + contents[pattern_index + 1:]
+        embeddings = list(self.embedding_function(others)) if others else []
+        embeddings.insert(pattern_index, pattern_embedding)
+        return embeddings
     
     def search_schema(
         self,
@@ -98,22 +205,43 @@ class VectorStore:
         Returns:
             List of relevant documents with content and metadata
         """
+        return [
+            {"content": content, "metadata": dict(metadata)}
+            for content, metadata in self._search_cached(query, n_results, True)
+        ]
+    
+    def _query_schema(self, query: str, n_results: int, with_metadata: bool) -> Tuple[Tuple[str, Tuple], ...]:
+        """
+        Run a semantic search against the collection.
+        
+        Only the fields the caller uses are requested, so Chroma skips
+        serializing distances (and metadata when not needed).
+        
+        Args:
+            query: Natural language query
+            n_results: Number of results to return
+            with_metadata: Whether to fetch document metadata
+            
+        Returns:
+            Immutable (content, metadata items) rows, safe to cache
+        """
         results = self.collection.query(
             query_texts=[query],
-            n_results=n_results
+            n_results=n_results,
+            include=["documents", "metadatas"] if with_metadata else ["documents"]
         )
         
         # Format results
         documents = []
         if results.get("documents") and results["documents"] and len(results["documents"]) > 0:  # type: ignore
             for i in range(len(results["documents"][0])):  # type: ignore
-                documents.append({
-                    "content": results["documents"][0][i],  # type: ignore
-                    "metadata": results["metadatas"][0][i] if results.get("metadatas") else {},  # type: ignore
-                    "distance": results["distances"][0][i] if results.get("distances") else None  # type: ignore
-                })
+                metadata = results["metadatas"][0][i] if results.get("metadatas") else {}  # type: ignore
+                documents.append((
+                    results["documents"][0][i],  # type: ignore
+                    tuple((metadata or {}).items())
+                ))
         
-        return documents
+        return tuple(documents)
     
     def get_relevant_context(self, query: str) -> str:
         """
@@ -125,16 +253,81 @@ class VectorStore:
         Returns:
             Formatted context string
         """
-        documents = self.search_schema(query, n_results=3)
+        documents = self._search_cached(query, 3, False)
         
         context_parts = ["# Relevant Database Schema Information\n"]
         
-        for doc in documents:
-            context_parts.append(doc["content"])
+        for content, _ in documents:
+            context_parts.append(content)
+            context_parts.append("\n---\n")
+        
+        return "\n".join(context_parts)
+    
+    def search_documents_multi(self, queries: List[str], n_results: int = 3) -> List[str]:
+        """
+        Search schema documents for several phrasings with one batched query.
+        
+        Args:
+            queries: Natural language queries (e.g. the original plus expansions)
+            n_results: Number of results per query
+            
+        Returns:
+            Document contents in first-occurrence order, without duplicates
+        """
+        results = self.collection.query(
+            query_texts=queries,
+            n_results=n_results,
+            include=["documents"]
+        )
+        
+        # Keep first occurrence order across all queries
+        return list(dict.fromkeys(
+            content
+            for query_documents in (results.get("documents") or [])
+            for content in query_documents
+        ))
+    
+    def format_context(self, contents: List[str]) -> str:
+        """
+        Format schema documents as a context string.
+        
+        Args:
+            contents: Document contents
+            
+        Returns:
+            Formatted context string
+        """
+        context_parts = ["# Relevant Database Schema Information\n"]
+        
+        for content in contents:
+            context_parts.append(content)
             context_parts.append("\n---\n")
         
         return "\n".join(context_parts)
     
+    def get_relevant_context_multi(self, queries: List[str], n_results: int = 3) -> str:
+        """
+        Get relevant schema context for several phrasings with one batched query.
+        
+        Args:
+            queries: Natural language queries (e.g. the original plus expansions)
+            n_results: Number of results per query
+            
+        Returns:
+            Formatted context string with duplicate documents removed
+        """
+        return self.format_context(self.search_documents_multi(queries, n_results))
+    
+    def get_all_documents(self) -> List[str]:
+        """
+        Get every schema document in insertion order.
+        
+        Returns:
+            Document contents
+        """
+        results = self.collection.get(include=["documents"])
+        return list(results.get("documents") or [])
+    
     def get_all_tables_summary(self) -> str:
         """
         Get a summary of all tables in the database.
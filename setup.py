@@ -8,6 +8,7 @@ Run this script once to:
 """
 
 import sys
+import threading
 from pathlib import Path
 
 # Add project root to path
@@ -15,8 +16,18 @@ project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 from config.settings import settings
+from database.db_manager import materialized_db_path
 from database.db_setup import DatabaseSetup
 from rag.vector_store import initialize_vector_store
+from utils.embeddings import get_embedding_function
+
+
+def _preload_embedding_model():
+    """Load the shared embedding model (and run it once) so indexing finds it resident."""
+    try:
+        get_embedding_function()(["warm up"])
+    except Exception as e:
+        print(f"⚠️  Could not preload embedding model: {e}")
 
 
 def main():
@@ -41,6 +52,10 @@ def main():
     # Ensure directories exist
     settings.ensure_directories()
     
+    # Load the embedding model while the database is being set up
+    model_preload = threading.Thread(target=_preload_embedding_model, daemon=True)
+    model_preload.start()
+    
     # Setup database
     print("\n2️⃣  Setting up database...")
     if settings.DATABASE_PATH.exists():
@@ -50,6 +65,8 @@ def main():
             print("Skipping database setup...")
         else:
             settings.DATABASE_PATH.unlink()
+            # Summary tables were built from the old data
+            materialized_db_path(settings.DATABASE_PATH).unlink(missing_ok=True)
             db_setup = DatabaseSetup()
             db_setup.setup_complete()
     else:
@@ -58,6 +75,7 @@ def main():
     
     # Initialize vector store
     print("\n3️⃣  Initializing vector store...")
+    model_preload.join()
     try:
         initialize_vector_store(force_refresh=False)
         print("✅ Vector store initialized")
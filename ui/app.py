@@ -6,6 +6,8 @@ Main application entry point.
 
 import streamlit as st
 import sys
+import re
+import time
 import pandas as pd
 from pathlib import Path
 from datetime import datetime
@@ -24,7 +26,8 @@ from ui.components import (
     render_loading,
     render_error_state,
     init_session_state,
-    render_database_setup
+    render_database_setup,
+    release_session
 )
 from ui.visualizer import DataVisualizer
 from rag.vector_store import initialize_vector_store
@@ -33,6 +36,28 @@ from database.connection_manager import DatabaseConnectionManager
 from rag.dynamic_vector_store import DynamicVectorStore
 
 
+# Short questions naming a table skip vector search for their schema context
+DIRECT_TABLE_QUERY_MAX_CHARS = 80
+
+_WORD_RE = re.compile(r"\w+")
+
+# Re-submitted questions replay their stored result and insights for a while
+QUERY_REPLAY_MAX_ENTRIES = 20
+QUERY_REPLAY_TTL_SECONDS = 300
+
+
+@st.cache_resource
+def get_connection_manager() -> DatabaseConnectionManager:
+    """Get the connection manager shared by every rerun and browser session."""
+    return DatabaseConnectionManager()
+
+
+@st.cache_resource
+def get_dynamic_vector_store() -> DynamicVectorStore:
+    """Get the vector store manager (Chroma client and embedder) shared across reruns."""
+    return DynamicVectorStore()
+
+
 class SQLAnalystApp:
     """Main Streamlit application class."""
     
@@ -40,8 +65,9 @@ class SQLAnalystApp:
         """Initialize the application."""
         self.setup_page()
         init_session_state()
-        self.connection_manager = DatabaseConnectionManager()
-        self.dynamic_vector_store = DynamicVectorStore()
+        # Cached resources: both keep per-session state keyed by session_id
+        self.connection_manager = get_connection_manager()
+        self.dynamic_vector_store = get_dynamic_vector_store()
         self.initialize_components()
     
     def setup_page(self):
@@ -99,6 +125,7 @@ class SQLAnalystApp:
                         conn_info = self.connection_manager.connections[session_id]
                     elif db_info['connection_method'] == 'connection_string':
                         st.error("❌ Connection lost. Please reconnect to your database.")
+                        release_session(self.connection_manager, self.dynamic_vector_store, session_id)
                         st.session_state.db_connected = False
                         if 'db_info' in st.session_state:
                             del st.session_state.db_info
@@ -106,6 +133,7 @@ class SQLAnalystApp:
                         return
                     else:
                         st.error("❌ Connection lost. Please reconnect to your database.")
+                        release_session(self.connection_manager, self.dynamic_vector_store, session_id)
                         st.session_state.db_connected = False
                         if 'db_info' in st.session_state:
                             del st.session_state.db_info
@@ -114,7 +142,12 @@ class SQLAnalystApp:
                 
                 engine = conn_info['engine']
                 
-                # Get or create vector store
+                # Wait for the background indexing started at connect time
+                vs_init_thread = st.session_state.pop('vs_init_thread', None)
+                if vs_init_thread is not None:
+                    vs_init_thread.join()
+                
+                # Get or create vector store (built here if background indexing failed)
                 vectorstore = self.dynamic_vector_store.get_store(session_id)
                 if vectorstore is None:
                     vectorstore = self.dynamic_vector_store.initialize_for_session(
@@ -163,6 +196,21 @@ class SQLAnalystApp:
             visualizer = st.session_state.visualizer
             render_results(st.session_state.last_result, st.session_state.get('last_insights', ''), visualizer, key_prefix="prev_")
     
+    def get_mentioned_tables(self, query: str) -> list:
+        """
+        Find connected tables a short question names explicitly.
+        
+        Args:
+            query: User's natural language question
+            
+        Returns:
+            Matching table names (empty for long questions or no match)
+        """
+        if len(query) >= DIRECT_TABLE_QUERY_MAX_CHARS or 'db_info' not in st.session_state:
+            return []
+        tokens = set(_WORD_RE.findall(query.lower()))
+        return [table for table in st.session_state.db_info['schema_info'] if table.lower() in tokens]
+    
     def process_query(self, query: str):
         """
         Process user query and display results with conversation memory.
@@ -187,10 +235,34 @@ class SQLAnalystApp:
         st.session_state.last_result = None
         st.session_state.last_insights = None
         
-        # Show loading state
-        with st.spinner("🤔 Analyzing your question..."):
-            # Execute query with conversation memory
-            result = agent.query(query, st.session_state.conversation_memory)
+        # Same standalone question on the same connection: replay instead of
+        # re-querying. Earlier submissions of this very question are not
+        # context; any other prior exchange makes it a possible follow-up.
+        normalized = query.strip().lower()
+        context = list(st.session_state.conversation_memory)
+        while context and context[-1]['question'].strip().lower() == normalized:
+            context.pop()
+        replay_cache = st.session_state.setdefault('query_replay_cache', {})
+        replay_key = (st.session_state.get('session_id'), normalized)
+        
+        replayed = None
+        if not context:
+            replayed = replay_cache.get(replay_key)
+            if replayed is not None and time.time() - replayed[2] > QUERY_REPLAY_TTL_SECONDS:
+                del replay_cache[replay_key]
+                replayed = None
+        
+        if replayed is not None:
+            result, insights, _ = replayed
+        else:
+            # Show loading state
+            with st.spinner("🤔 Analyzing your question..."):
+                # Execute query with conversation memory
+                result = agent.query(
+                    query,
+                    st.session_state.conversation_memory,
+                    tables=self.get_mentioned_tables(query)
+                )
         
         # Store conversation context
         if result["success"]:
@@ -212,20 +284,26 @@ class SQLAnalystApp:
             if len(st.session_state.previous_results) > 3:
                 st.session_state.previous_results = st.session_state.previous_results[-3:]
         
-        # If successful, generate insights
-        insights = ""
-        if result["success"] and result["data"] is not None:
-            with st.spinner("💡 Generating insights..."):
-                insights = agent.generate_insights(
-                    query,
-                    result["data"],
-                    result["sql_query"]
-                )
+        # If successful, generate insights (replays already carry theirs)
+        if replayed is None:
+            insights = ""
+            if result["success"] and result["data"] is not None:
+                with st.spinner("💡 Generating insights..."):
+                    insights = agent.generate_insights(
+                        query,
+                        result["data"],
+                        result["sql_query"]
+                    )
         
         # Store results in session state
         st.session_state.last_result = result
         st.session_state.last_insights = insights
         
+        if result["success"] and not context and replayed is None:
+            replay_cache[replay_key] = (result, insights, time.time())
+            while len(replay_cache) > QUERY_REPLAY_MAX_ENTRIES:
+                del replay_cache[next(iter(replay_cache))]
+        
         # Render results
         render_results(result, insights, visualizer)
 
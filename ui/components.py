@@ -7,6 +7,7 @@ import pandas as pd
 from typing import Optional
 from datetime import datetime
 import json
+import threading
 
 
 def init_session_state():
@@ -958,6 +959,43 @@ def render_error_state(error_message: str):
     st.info("💡 Try rephrasing your question or check the example questions in the sidebar.")
 
 
+def start_vector_store_init(dynamic_vector_store, session_id: str, engine):
+    """
+    Start building a session's vector store on a daemon thread.
+    
+    The thread is kept in session state so agent initialization can join it
+    instead of indexing the schema again.
+    
+    Args:
+        dynamic_vector_store: DynamicVectorStore instance
+        session_id: Session the store belongs to
+        engine: SQLAlchemy engine of the connected database
+    """
+    thread = threading.Thread(
+        target=dynamic_vector_store.initialize_for_session,
+        kwargs={'session_id': session_id, 'engine': engine},
+        daemon=True
+    )
+    thread.start()
+    st.session_state.vs_init_thread = thread
+
+
+def release_session(connection_manager, dynamic_vector_store, session_id: str):
+    """
+    Disconnect a session and drop its vector store.
+    
+    Both managers are shared by the whole process, so a session that is
+    replaced has to be released explicitly.
+    
+    Args:
+        connection_manager: DatabaseConnectionManager instance
+        dynamic_vector_store: DynamicVectorStore instance
+        session_id: Session to release
+    """
+    connection_manager.disconnect(session_id)
+    dynamic_vector_store.cleanup_session(session_id)
+
+
 def render_database_setup(connection_manager, dynamic_vector_store):
     """
     Render database setup screen for connecting to a database.
@@ -1008,9 +1046,15 @@ def render_database_setup(connection_manager, dynamic_vector_store):
             st.info(f"🔗 Connected to: **{pending.get('file_name', pending.get('db_type_selected', 'Database'))}** ({pending['db_type']})")
         with col2:
             if st.button("✅ Start Analyzing", type="primary", key="start_analyzing_main", use_container_width=True):
+                previous = st.session_state.get('db_info')
+                if previous is not None and previous['session_id'] != pending['session_id']:
+                    release_session(connection_manager, dynamic_vector_store, previous['session_id'])
+                    st.session_state.pop('agent', None)
                 st.session_state.db_connected = True
                 st.session_state.db_info = st.session_state.pending_connection
                 del st.session_state.pending_connection  # Clear pending
+                # Replayed answers belong to the previous database
+                st.session_state.pop('query_replay_cache', None)
                 st.rerun()
         
         return
@@ -1053,12 +1097,12 @@ def render_database_setup(connection_manager, dynamic_vector_store):
                             )
                             
                             if result['success']:
-                                # Initialize vector store
-                                with st.spinner("🔍 Analyzing database schema..."):
-                                    vectorstore = dynamic_vector_store.initialize_for_session(
-                                        session_id=session_id,
-                                        engine=connection_manager.get_connection(session_id)['engine']
-                                    )
+                                # Index the schema in the background while the user reviews it
+                                start_vector_store_init(
+                                    dynamic_vector_store,
+                                    session_id,
+                                    connection_manager.get_connection(session_id)['engine']
+                                )
                                 
                                 # Show schema info
                                 st.markdown("### 📋 Database Schema")
@@ -1147,12 +1191,12 @@ def render_database_setup(connection_manager, dynamic_vector_store):
                             print(f"[DEBUG] Result keys: {list(result.keys())}")
                             
                             if result['success']:
-                                # Initialize vector store
-                                with st.spinner("🔍 Analyzing database schema..."):
-                                    vectorstore = dynamic_vector_store.initialize_for_session(
-                                        session_id=session_id,
-                                        engine=connection_manager.get_connection(session_id)['engine']
-                                    )
+                                # Index the schema in the background while the user reviews it
+                                start_vector_store_init(
+                                    dynamic_vector_store,
+                                    session_id,
+                                    connection_manager.get_connection(session_id)['engine']
+                                )
                                 
                                 # Show schema info
                                 st.markdown("### 📋 Database Schema")
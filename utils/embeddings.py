@@ -0,0 +1,42 @@
+"""
+Shared local embedding function.
+"""
+import functools
+import importlib.util
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from chromadb.api.types import EmbeddingFunction
+
+
+# Same MiniLM model Chroma's default ONNX embedder ships with
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+
+@functools.lru_cache(maxsize=1)
+def get_embedding_function() -> "EmbeddingFunction":
+    """
+    Get the process-wide embedding function for schema search and caches.
+    
+    Uses SentenceTransformers (batched encoding, normalized vectors) when it
+    is installed. Otherwise runs Chroma's ONNX MiniLM model in one tuned,
+    long-lived session, with INT8 weights when the onnx package is available
+    to quantize them. Caching here means the model weights are loaded once,
+    however many vector stores, routers and caches are created.
+    
+    Returns:
+        Chroma-compatible embedding function
+    """
+    from chromadb.utils import embedding_functions
+    
+    if importlib.util.find_spec("sentence_transformers"):
+        return embedding_functions.SentenceTransformerEmbeddingFunction(
+            model_name=EMBEDDING_MODEL_NAME,
+            normalize_embeddings=True
+        )
+    
+    from utils.onnx_embeddings import QuantizedMiniLM, TunedMiniLM
+    
+    if importlib.util.find_spec("onnx"):
+        return QuantizedMiniLM()
+    return TunedMiniLM()
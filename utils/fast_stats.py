@@ -0,0 +1,63 @@
+"""
+Single-pass summary statistics for numeric result columns.
+"""
+from typing import Tuple
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # numba is optional; fall back to NumPy reductions
+    numba = None
+
+
+def _col_stats_loop(arr: np.ndarray) -> Tuple[float, float, float, float, int]:
+    """Compute (sum, mean, min, max, nan_count) in one pass over a float64 array."""
+    total = 0.0
+    count = 0
+    nan_count = 0
+    lo = np.inf
+    hi = -np.inf
+    for i in range(arr.shape[0]):
+        value = arr[i]
+        if np.isnan(value):
+            nan_count += 1
+            continue
+        total += value
+        count += 1
+        if value < lo:
+            lo = value
+        if value > hi:
+            hi = value
+    if count == 0:
+        return 0.0, np.nan, np.nan, np.nan, nan_count
+    return total, total / count, lo, hi, nan_count
+
+
+if numba is not None:
+    _col_stats_kernel = numba.njit(cache=True, nogil=True)(_col_stats_loop)
+else:
+    _col_stats_kernel = None
+
+
+def col_stats(arr: np.ndarray) -> Tuple[float, float, float, float, int]:
+    """
+    Compute basic statistics for a numeric column.
+
+    Args:
+        arr: 1-D numeric array (NaN marks missing values)
+
+    Returns:
+        Tuple of (sum, mean, min, max, nan_count)
+    """
+    arr = np.ascontiguousarray(arr, dtype=np.float64)
+
+    if _col_stats_kernel is not None:
+        return _col_stats_kernel(arr)
+
+    nan_mask = np.isnan(arr)
+    nan_count = int(nan_mask.sum())
+    if nan_count == arr.shape[0]:
+        return 0.0, np.nan, np.nan, np.nan, nan_count
+    values = arr[~nan_mask] if nan_count else arr
+    total = float(values.sum())
+    return total, total / values.shape[0], float(values.min()), float(values.max()), nan_count
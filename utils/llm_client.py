@@ -0,0 +1,70 @@
+"""
+Shared Groq chat clients.
+"""
+import functools
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import httpx
+    from langchain_groq import ChatGroq
+
+
+@functools.lru_cache(maxsize=1)
+def _get_http_client() -> "httpx.Client":
+    """One pooled HTTP client so every LLM caller reuses warm TCP/TLS connections."""
+    import httpx
+    return httpx.Client(limits=httpx.Limits(max_keepalive_connections=10))
+
+
+@functools.lru_cache(maxsize=8)
+def get_llm(model: str, api_key: str, temperature: float) -> "ChatGroq":
+    """
+    Get a shared ChatGroq client for a model/key/temperature combination.
+    
+    Streamlit reruns recreate agents; caching here keeps one client per
+    configuration for the whole process. langchain_groq is imported on
+    first use so importing the agent modules stays cheap.
+    
+    Args:
+        model: Groq model name
+        api_key: Groq API key
+        temperature: Sampling temperature
+        
+    Returns:
+        ChatGroq instance
+    """
+    from langchain_groq import ChatGroq
+    
+    return ChatGroq(
+        model=model,
+        api_key=api_key,  # type: ignore
+        temperature=temperature,
+        http_client=_get_http_client()
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def warm_up_llm_connection(model: str, api_key: str) -> threading.Thread:
+    """
+    Open the shared HTTP connection pool with one tiny request, once per process.
+    
+    Every client shares one pooled httpx client, so a single 1-token call
+    warms TCP/TLS for all of them. Runs on a daemon thread; nothing waits on it.
+    
+    Args:
+        model: Groq model name
+        api_key: Groq API key
+        
+    Returns:
+        The warm-up thread
+    """
+    def _warm_up():
+        try:
+            get_llm(model, api_key, 0.0).bind(max_tokens=1).invoke("ok")
+        except Exception as e:
+            print(f"⚠️  LLM warm-up failed: {e}")
+    
+    thread = threading.Thread(target=_warm_up, daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,71 @@
+"""
+Tuned variants of Chroma's ONNX MiniLM embedder.
+"""
+import os
+from functools import cached_property
+from typing import Any
+
+from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+
+
+# INT8 copy of the ONNX weights, written next to the FP32 model on first use
+QUANTIZED_MODEL_FILENAME = "model_quantized.onnx"
+
+# Roughly one intra-op thread per physical core (hyperthreads add little for GEMMs)
+ONNX_INTRA_OP_THREADS = max(1, (os.cpu_count() or 2) // 2)
+
+
+class TunedMiniLM(ONNXMiniLM_L6_V2):
+    """
+    Chroma's MiniLM embedder with one long-lived, explicitly tuned CPU session.
+    
+    Chroma's DefaultEmbeddingFunction builds a fresh ONNXMiniLM_L6_V2 (and so
+    a fresh InferenceSession) on every call; this class keeps its session and
+    sizes the intra-op thread pool to the machine. Tokenization, mean pooling
+    and L2 normalization are inherited unchanged, so vectors are identical.
+    """
+    
+    def _model_path(self) -> str:
+        """Path of the ONNX model file to load."""
+        return os.path.join(self.DOWNLOAD_PATH, self.EXTRACTED_FOLDER_NAME, "model.onnx")
+    
+    @cached_property
+    def model(self) -> Any:
+        """Load the model once with full graph optimization on the CPU provider."""
+        so = self.ort.SessionOptions()
+        so.log_severity_level = 3
+        so.graph_optimization_level = self.ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        so.intra_op_num_threads = ONNX_INTRA_OP_THREADS
+        
+        return self.ort.InferenceSession(
+            self._model_path(),
+            providers=["CPUExecutionProvider"],
+            sess_options=so
+        )
+
+
+class QuantizedMiniLM(TunedMiniLM):
+    """
+    TunedMiniLM running dynamically quantized INT8 weights.
+    
+    Vectors stay comparable with the FP32 model's (quantization noise only).
+    """
+    
+    def _model_path(self) -> str:
+        """Path of the INT8 model, quantizing the FP32 weights on first use."""
+        model_dir = os.path.join(self.DOWNLOAD_PATH, self.EXTRACTED_FOLDER_NAME)
+        quantized_path = os.path.join(model_dir, QUANTIZED_MODEL_FILENAME)
+        
+        if not os.path.exists(quantized_path):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            
+            # Write to a temporary name so a crash never leaves a half-written model
+            tmp_path = quantized_path + ".tmp"
+            quantize_dynamic(
+                os.path.join(model_dir, "model.onnx"),
+                tmp_path,
+                weight_type=QuantType.QInt8
+            )
+            os.replace(tmp_path, quantized_path)
+        
+        return quantized_path